@@ -28,15 +28,21 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'dev-secret-key')
 # Enable CORS for all routes
 CORS(app, resources={r"/*": {"origins": "*"}})
 
-# Configure Redis with connection pooling and timeouts
+# Configure Redis with connection pooling and timeouts. The pool is bounded
+# and blocking, so concurrent requests reuse kept-alive connections and wait
+# briefly for a free one instead of opening new ones past the limit.
 redis_url = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
-redis_client = redis.from_url(
+redis_pool = redis.BlockingConnectionPool.from_url(
     redis_url,
+    max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', '64')),
+    timeout=5,
     socket_timeout=30,
     socket_connect_timeout=30,
+    socket_keepalive=True,
     retry_on_timeout=True,
     health_check_interval=30
 )
+redis_client = redis.Redis(connection_pool=redis_pool)
 
 # Initialize optimized rate limiter
 limiter = init_limiter(app)
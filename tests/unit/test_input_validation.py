@@ -17,7 +17,9 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 from tests.test_utils import flask_request_context
 
 # Import to test
-from travel_agent.security.input_validation import InputValidator, validate_json_request
+from travel_agent.security.input_validation import (
+    InputValidator, validate_json_request, _validate_session_id_cached
+)
 
 # Alias methods for readability
 validate_pattern = InputValidator.validate_pattern
@@ -30,6 +32,7 @@ sanitize_html = InputValidator.sanitize_html
 from travel_agent.security.input_validation import (
     validate_json_request,
     validate_message_request as validate_message_decorator,
+    validate_json_message_request,
     validate_session_id as validate_session_decorator
 )
 
@@ -57,18 +60,28 @@ class TestInputValidator(unittest.TestCase):
         # Test session ID validation
         self.assertFalse(validate_pattern("user@123", "session_id"))
         self.assertFalse(validate_pattern("", "session_id"))
+        self.assertFalse(validate_pattern("user_123\n", "session_id"))
+        self.assertFalse(validate_pattern("a" * 65, "session_id"))
+        self.assertFalse(validate_pattern("usér", "session_id"))
         
-        # Test message validation - only test empty message
+        # Test message validation - empty or over the length limit
         self.assertFalse(validate_pattern("", "message"))
+        self.assertFalse(validate_pattern("a" * 2000 + "\n", "message"))
         
         # Test email validation
         self.assertFalse(validate_pattern("user@", "email"))
         self.assertFalse(validate_pattern("user@example", "email"))
+        self.assertFalse(validate_pattern("user@example.com\n", "email"))
+        
+        # Test numeric validation
+        self.assertFalse(validate_pattern("123\n", "numeric"))
         
         # Test airport code validation
         self.assertFalse(validate_pattern("JF", "airport_code"))
         self.assertFalse(validate_pattern("jfk", "airport_code"))
         self.assertFalse(validate_pattern("1FK", "airport_code"))
+        self.assertFalse(validate_pattern("ÄBC", "airport_code"))
+        self.assertFalse(validate_pattern("JFK\n", "airport_code"))
     
     def test_sanitize_html(self):
         """Test HTML sanitization function."""
@@ -86,6 +99,11 @@ class TestInputValidator(unittest.TestCase):
         input_text = "Book a flight from <b>JFK</b> to <i>LAX</i>"
         sanitized = sanitize_html(input_text)
         self.assertEqual(sanitized, "Book a flight from &lt;b&gt;JFK&lt;/b&gt; to &lt;i&gt;LAX&lt;/i&gt;")
+        
+        # Quotes and ampersands are escaped, plain text is returned as is
+        self.assertEqual(sanitize_html("Tom & Jerry's \"trip\""), "Tom &amp; Jerry&#x27;s &quot;trip&quot;")
+        plain = "Find me a hotel in Riyadh for 2 nights"
+        self.assertIs(sanitize_html(plain), plain)
     
     def test_validate_json(self):
         """Test JSON validation function."""
@@ -147,6 +165,17 @@ class TestInputValidator(unittest.TestCase):
         is_valid, error = validate_session_id("session@123")
         self.assertFalse(is_valid)
         self.assertEqual(error, "Invalid session ID format")
+    
+    def test_validate_session_id_cached(self):
+        """Test repeated session IDs are served from the validation cache."""
+        _validate_session_id_cached.cache_clear()
+        for _ in range(3):
+            self.assertEqual(validate_session_id("session_456"), (True, None))
+            self.assertEqual(validate_session_id("bad id"), (False, "Invalid session ID format"))
+        
+        info = _validate_session_id_cached.cache_info()
+        self.assertEqual(info.misses, 2)
+        self.assertEqual(info.hits, 4)
 
 class TestFlaskDecorators(unittest.TestCase):
     """Test Flask decorators for input validation."""
@@ -190,6 +219,30 @@ class TestFlaskDecorators(unittest.TestCase):
         self.assertFalse(is_valid, "Should fail validation when message is missing")
         self.assertEqual(error, "Message is required", "Should report correct error for missing message")
     
+    def test_validate_json_message_request(self):
+        """Test the combined JSON and message decorator."""
+        with flask_request_context(json={'message': '<b>Hi</b>'}):
+            from flask import request
+            
+            @validate_json_message_request
+            def test_func():
+                return request.sanitized_data
+            
+            self.assertEqual(test_func(), {'message': '&lt;b&gt;Hi&lt;/b&gt;'})
+        
+        with flask_request_context(json={'message': ''}):
+            @validate_json_message_request
+            def test_func_invalid():
+                return 'success'  # This should not be called
+            
+            response, status = test_func_invalid()
+            self.assertEqual(status, 400)
+            self.assertEqual(response.get_json(), {"error": "Message format is invalid or too long"})
+        
+        with flask_request_context(headers={'Content-Type': 'text/plain'}):
+            response, status = test_func_invalid()
+            self.assertEqual(status, 415)
+    
     def test_validate_session_id(self):
         """Test validate_session_id decorator."""
         # Test with valid session ID - we need to pass the session_id as a keyword argument
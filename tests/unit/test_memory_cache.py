@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the in-memory cache tier.
+Tests LRU eviction and TTL expiry.
+"""
+
+import threading
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import components to test
+from travel_agent.config.memory_cache import MemoryCache
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Test the MemoryCache functionality."""
+
+    def test_evicts_least_recently_used(self):
+        """Test that a read refreshes recency so the coldest entry is evicted."""
+        cache = MemoryCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        self.assertEqual(cache.get("a"), 1)
+
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        self.assertEqual(cache.get("c"), 3)
+
+    def test_overwrite_does_not_evict(self):
+        """Test that updating an existing key keeps the other entries."""
+        cache = MemoryCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 10)
+
+        self.assertEqual(cache.get("a"), 10)
+        self.assertEqual(cache.get("b"), 2)
+
+    def test_eviction_prefers_low_value_entries(self):
+        """Test that among the least recent entries the lowest weight is evicted."""
+        cache = MemoryCache(max_size=20)
+        cache.set("visa", 1, weight=1.0)
+        cache.set("flight", 2, weight=0.2)
+        for i in range(18):
+            cache.set(f"key{i}", i)
+
+        cache.set("new", 0)
+
+        self.assertIn("visa", cache.cache)
+        self.assertNotIn("flight", cache.cache)
+
+    def test_hits_protect_entries(self):
+        """Test that a frequently read entry outlives an unread one of equal weight."""
+        cache = MemoryCache(max_size=20)
+        cache.set("cold", 1)
+        cache.set("hot", 2)
+        for i in range(18):
+            cache.set(f"key{i}", i)
+        for _ in range(3):
+            cache.get("hot")
+        # Make "hot" the least recent entry again
+        cache.cache.move_to_end("hot", last=False)
+
+        cache.set("new", 0)
+
+        self.assertIn("hot", cache.cache)
+        self.assertNotIn("cold", cache.cache)
+        self.assertEqual(cache.hits, 3)
+
+    def test_concurrent_access(self):
+        """Test that concurrent readers and writers keep the cache within bounds."""
+        cache = MemoryCache(max_size=50)
+
+        def worker(offset):
+            for i in range(500):
+                cache.set(f"key{(offset + i) % 120}", i)
+                cache.get(f"key{(offset + i * 7) % 120}")
+
+        threads = [threading.Thread(target=worker, args=(n * 13,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(cache), 50)
+        self.assertEqual(cache.hits + cache.misses, 8 * 500)
+
+    @patch("travel_agent.config.memory_cache.time.time")
+    def test_expired_entries_are_purged_on_access(self, mock_time):
+        """Test that expired entries are removed when looked up."""
+        mock_time.return_value = 1000.0
+        cache = MemoryCache()
+        cache.set("short", "value", ttl=10)
+        cache.set("forever", "value")
+
+        mock_time.return_value = 1011.0
+
+        self.assertIsNone(cache.get("short"))
+        self.assertNotIn("short", cache.cache)
+        self.assertEqual(cache.get("forever"), "value")
+
+
+if __name__ == "__main__":
+    unittest.main()
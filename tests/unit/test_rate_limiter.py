@@ -28,6 +28,8 @@ class TestRateLimiter(unittest.TestCase):
     def setUp(self):
         # Create a mock Redis client
         self.mock_redis = MagicMock()
+        # A separate mock for each registered script
+        self.mock_redis.register_script.side_effect = lambda script: MagicMock()
         self.limiter = RateLimiter(self.mock_redis)
     
     def test_get_rate_limit_key(self):
@@ -54,15 +56,11 @@ class TestRateLimiter(unittest.TestCase):
     
     def test_is_rate_limited_not_limited(self):
         """Test rate limiting when limit is not exceeded."""
-        # Set up mock pipeline
-        mock_pipeline = MagicMock()
-        self.mock_redis.pipeline.return_value = mock_pipeline
-        
-        # Configure pipeline to return values for not limited case
-        mock_pipeline.execute.return_value = [0, 5, 0, 1]  # zremrangebyscore, zcard, zadd, expire
+        # Configure the script to report requests already in the window
+        self.limiter._sliding_window.return_value = 5
         
         # Test IP-based rate limiting
-        is_limited, info = self.limiter.is_rate_limited('ip', '127.0.0.1', 10, 60)
+        is_limited, info = self.limiter.is_rate_limited('ip', '127.0.0.1', 10, 60, strategy='sliding')
         
         # Verify results
         self.assertFalse(is_limited)
@@ -70,21 +68,30 @@ class TestRateLimiter(unittest.TestCase):
         self.assertEqual(info['remaining'], 5)  # 10 - 5 = 5
         self.assertTrue('reset' in info)
         
-        # Verify Redis operations
-        self.mock_redis.pipeline.assert_called_once()
-        self.assertEqual(mock_pipeline.zremrangebyscore.call_count, 1)
-        self.assertEqual(mock_pipeline.zcard.call_count, 1)
-        self.assertEqual(mock_pipeline.zadd.call_count, 1)
-        self.assertEqual(mock_pipeline.expire.call_count, 1)
+        # Verify a single atomic script call replaces the pipeline
+        self.limiter._sliding_window.assert_called_once()
+        kwargs = self.limiter._sliding_window.call_args.kwargs
+        self.assertEqual(kwargs['keys'], ['ratelimit:ip:127.0.0.1'])
+        window_start, current_time, limit, period, member = kwargs['args']
+        self.assertEqual(current_time - window_start, 60)
+        self.assertEqual((limit, period), (10, 60))
+        self.assertTrue(member.startswith(f"{current_time}:"))
+        self.mock_redis.pipeline.assert_not_called()
+    
+    def test_requests_in_same_second_are_distinct(self):
+        """Test that each request is recorded under its own sorted set member."""
+        self.limiter._sliding_window.return_value = 0
+        
+        self.limiter.is_rate_limited('user', 'user123', 10, 60)
+        self.limiter.is_rate_limited('user', 'user123', 10, 60)
+        
+        members = [c.kwargs['args'][4] for c in self.limiter._sliding_window.call_args_list]
+        self.assertNotEqual(members[0], members[1])
     
     def test_is_rate_limited_exceeded(self):
         """Test rate limiting when limit is exceeded."""
-        # Set up mock pipeline
-        mock_pipeline = MagicMock()
-        self.mock_redis.pipeline.return_value = mock_pipeline
-        
-        # Configure pipeline to return values for limited case
-        mock_pipeline.execute.return_value = [0, 10, 0, 1]  # zremrangebyscore, zcard, zadd, expire
+        # Configure the script to report a full window
+        self.limiter._sliding_window.return_value = 10
         
         # Test user-based rate limiting
         is_limited, info = self.limiter.is_rate_limited('user', 'user123', 10, 60)
@@ -96,16 +103,32 @@ class TestRateLimiter(unittest.TestCase):
         self.assertTrue('reset' in info)
         
         # Verify Redis operations
-        self.mock_redis.pipeline.assert_called_once()
+        self.limiter._sliding_window.assert_called_once()
+    
+    def test_fixed_window_counter(self):
+        """Test that IP limits use one counter per window by default."""
+        self.limiter._fixed_window.return_value = 6  # Includes this request
+        
+        with patch('travel_agent.security.rate_limiter.time.time', return_value=1000):
+            is_limited, info = self.limiter.is_rate_limited('ip', '127.0.0.1', 10, 60)
+        
+        self.assertFalse(is_limited)
+        self.assertEqual(info['count'], 5)
+        self.assertEqual(info['remaining'], 5)
+        self.assertEqual(info['reset'], 1020)
+        self.assertEqual(info['now'], 1000)
+        self.limiter._fixed_window.assert_called_once_with(keys=['ratelimit:ip:127.0.0.1:16'], args=[60])
+        self.limiter._sliding_window.assert_not_called()
+        
+        # The request over the limit is rejected
+        self.limiter._fixed_window.return_value = 11
+        is_limited, info = self.limiter.is_rate_limited('ip', '127.0.0.1', 10, 60)
+        self.assertTrue(is_limited)
+        self.assertEqual(info['remaining'], 0)
     
     def test_default_limits(self):
         """Test using default limits."""
-        # Set up mock pipeline
-        mock_pipeline = MagicMock()
-        self.mock_redis.pipeline.return_value = mock_pipeline
-        
-        # Configure pipeline to return values
-        mock_pipeline.execute.return_value = [0, 5, 0, 1]  # zremrangebyscore, zcard, zadd, expire
+        self.limiter._fixed_window.return_value = 6
         
         # Test using default limit for 'ip'
         is_limited, info = self.limiter.is_rate_limited('ip', '127.0.0.1')
@@ -113,15 +136,19 @@ class TestRateLimiter(unittest.TestCase):
         # Default for IP should be 60 per minute
         self.assertEqual(info['limit'], 60)
         
-        # Reset for next test
-        mock_pipeline.reset_mock()
-        
         # Test using default limit for endpoint
-        mock_pipeline.execute.return_value = [0, 3, 0, 1]
+        self.limiter._fixed_window.return_value = 4
         is_limited, info = self.limiter.is_rate_limited('endpoint', 'api/chat')
         
         # Default for api/chat endpoint should be 10 per minute
         self.assertEqual(info['limit'], 10)
+        self.assertEqual(info['count'], 3)
+        
+        # Unknown endpoints and key types fall back to the global limit
+        is_limited, info = self.limiter.is_rate_limited('endpoint', 'api/other')
+        self.assertEqual(info['limit'], 300)
+        is_limited, info = self.limiter.is_rate_limited('token', 'abc', strategy='fixed')
+        self.assertEqual(info['limit'], 300)
 
 # Flask decorator test
 class TestRateLimitDecorator(unittest.TestCase):
@@ -164,12 +191,13 @@ class TestRateLimitDecorator(unittest.TestCase):
         with flask_request_context():
             
             # Configure mock limiter for rate limited case
-            reset_time = int(time.time()) + 60
+            now = int(time.time())
             self.mock_limiter.is_rate_limited.return_value = (True, {
                 'limit': 10,
                 'remaining': 0,
-                'reset': reset_time,
-                'count': 10
+                'reset': now + 60,
+                'count': 10,
+                'now': now
             })
             
             # Create a test function
@@ -201,7 +229,7 @@ class TestRateLimitDecorator(unittest.TestCase):
             self.assertIn('X-RateLimit-Limit', headers)
             self.assertIn('X-RateLimit-Remaining', headers)
             self.assertIn('X-RateLimit-Reset', headers)
-            self.assertIn('Retry-After', headers)
+            self.assertEqual(headers['Retry-After'], '60')
     
     def test_custom_identifier(self):
         """Test rate_limit decorator with custom identifier."""
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Unit tests for search result parser module.
+Tests flight and hotel extraction from raw Serper API responses.
+"""
+
+import json
+import unittest
+from unittest.mock import patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import components to test
+from travel_agent.search_result_parser import (
+    SearchResultParser, ParsedFlight, _find_price, _find_time_range, _TIME_RE, _parse_cache
+)
+
+FLIGHT_RESULTS = {
+    "organic": [
+        {
+            "title": "Saudia Flight SV1234 from DMM to RUH - $120",
+            "snippet": "Nonstop. Departs 07:30 AM - 08:45 AM. Duration 1h 15m.",
+            "link": "https://www.expedia.com/flights/dmm-ruh"
+        },
+        {
+            "title": "Cheap flights Dammam to Riyadh",
+            "snippet": "Fares from $95 with flynas, 1 stop.",
+            "link": "https://www.skyscanner.net/routes/dmm/ruh"
+        }
+    ],
+    "relatedSearches": [{"query": "dammam to riyadh train"}]
+}
+
+HOTEL_RESULTS = {
+    "organic": [
+        {
+            "title": "Book Hilton Riyadh Hotel, Riyadh - Booking.com",
+            "snippet": "5-star hotel from $250 per night.",
+            "link": "https://www.booking.com/hotel/sa/hilton-riyadh.html"
+        }
+    ],
+    "knowledgeGraph": {"title": "Riyadh", "description": "Capital of Saudi Arabia"}
+}
+
+METADATA = {"query": "flights from DMM to RUH", "search_type": "organic", "location": None, "timestamp": 1714000000.25}
+
+
+class TestSearchResultParser(unittest.TestCase):
+    """Test the SearchResultParser functionality."""
+
+    def setUp(self):
+        _parse_cache.clear()
+
+    def test_empty_results_fast_path(self):
+        """Test that missing or empty organic results short-circuit to an empty list."""
+        params = {"origin": "DMM", "destination": "RUH", "date": "2025-05-01"}
+        self.assertEqual(SearchResultParser.process_search_results({}, "flight", params), [])
+        self.assertEqual(SearchResultParser.process_search_results(None, "hotel", params), [])
+        self.assertEqual(
+            SearchResultParser.process_search_results({"organic": []}, "flight", params), []
+        )
+
+    def test_flight_extraction(self):
+        """Test structured flight extraction from organic results."""
+        params = {"origin": "dmm", "destination": "ruh", "date": "2025-05-01"}
+        flights = SearchResultParser.process_search_results(FLIGHT_RESULTS, "Flight", params)
+
+        self.assertEqual(len(flights), 3)
+        first = flights[0]
+        self.assertEqual(first["id"], "flight_1")
+        self.assertEqual(first["origin"], "DMM")
+        self.assertEqual(first["destination"], "RUH")
+        self.assertEqual(first["price"], "$120")
+        self.assertEqual(first["price_value"], 120)
+        self.assertEqual(first["airline"], "Saudia")
+        self.assertEqual(first["flight_number"], "SV1234")
+        self.assertEqual(first["departure_time"], "07:30 AM")
+        self.assertEqual(first["arrival_time"], "08:45 AM")
+        self.assertEqual(first["duration"], "1h 15m")
+        self.assertEqual(first["stops"], 0)
+        self.assertEqual(first["source"], "Expedia")
+
+        second = flights[1]
+        self.assertEqual(second["price_value"], 95)
+        self.assertEqual(second["airline"], "flynas")
+        self.assertEqual(second["stops"], 1)
+        self.assertEqual(second["source"], "Skyscanner")
+        self.assertLess(second["confidence"], first["confidence"])
+
+        related = flights[2]
+        self.assertEqual(related["type"], "related_search")
+        self.assertEqual(related["query"], "dammam to riyadh train")
+
+    def test_extractor_returns_compact_records(self):
+        """Test that extractors build slotted records that convert to the API dict shape."""
+        flights = SearchResultParser.extract_flight_details(
+            FLIGHT_RESULTS["organic"], "DMM", "RUH", "2025-05-01"
+        )
+
+        self.assertIsInstance(flights[0], ParsedFlight)
+        self.assertFalse(hasattr(flights[0], "__dict__"))
+        record = flights[1].to_dict()
+        self.assertNotIn("departure_time", record)
+        self.assertEqual(record["stops"], 1)
+        self.assertEqual(record["price"], "$95")
+
+    def test_generic_flight_number_reused_as_airline(self):
+        """Test that a generic flight number match fills both airline and flight number."""
+        organic = [
+            {"title": "Emirates EK815 Dammam to Dubai", "snippet": "", "link": ""},
+            {"title": "Cheap flights to Riyadh", "snippet": "Compare fares", "link": ""}
+        ]
+        flights = SearchResultParser.extract_flight_details(organic, "DMM", "DXB", "2025-05-01")
+
+        self.assertEqual(flights[0].airline, "EK815")
+        self.assertEqual(flights[0].flight_number, "EK815")
+        self.assertIsNone(flights[1].airline)
+        self.assertIsNone(flights[1].flight_number)
+
+    def test_hotel_extraction(self):
+        """Test structured hotel extraction including knowledge graph entries."""
+        params = {"location": "Riyadh", "check_in": "2025-05-01", "check_out": "2025-05-03"}
+        hotels = SearchResultParser.process_search_results(HOTEL_RESULTS, "hotel", params)
+
+        self.assertEqual(len(hotels), 2)
+        hotel = hotels[0]
+        self.assertEqual(hotel["name"], "Hilton Riyadh Hotel")
+        self.assertEqual(hotel["price_value"], 250)
+        self.assertEqual(hotel["rating"], "5 stars")
+        self.assertEqual(hotels[1]["type"], "knowledge_graph")
+        self.assertEqual(hotels[1]["title"], "Riyadh")
+
+    def test_repeated_payload_uses_cache(self):
+        """Test that a response parsed again, even after a cache round trip, is served as fresh copies."""
+        params = {"origin": "DMM", "destination": "RUH", "date": "2025-05-01"}
+        payload = dict(FLIGHT_RESULTS, _metadata=METADATA)
+        first = SearchResultParser.process_search_results(payload, "flight", params)
+        first[0]["price_value"] = 1
+
+        with patch("travel_agent.search_result_parser.extract_flight_details") as extract:
+            second = SearchResultParser.process_search_results(json.loads(json.dumps(payload)), "flight", params)
+            extract.assert_not_called()
+
+        self.assertEqual(second[0]["price_value"], 120)
+        self.assertIsNot(second[0], first[0])
+
+        # A different date is a different cache entry
+        other = SearchResultParser.process_search_results(
+            payload, "flight", dict(params, date="2025-05-02")
+        )
+        self.assertEqual(other[0]["date"], "2025-05-02")
+
+        # A later response to the same query is parsed again
+        with patch("travel_agent.search_result_parser.extract_flight_details", return_value=[]) as extract:
+            SearchResultParser.process_search_results(
+                dict(payload, _metadata=dict(METADATA, timestamp=1714000100.5)), "flight", params
+            )
+            extract.assert_called_once()
+
+    def test_payload_without_metadata_is_not_cached(self):
+        """Test that payloads not stamped by SearchToolManager are always parsed."""
+        params = {"origin": "DMM", "destination": "RUH", "date": "2025-05-01"}
+        SearchResultParser.process_search_results(FLIGHT_RESULTS, "flight", params)
+
+        self.assertEqual(len(_parse_cache.cache), 0)
+
+    def test_cache_hits_copy_nested_values(self):
+        """Test that nested values of cached dict rows are not shared between callers."""
+        payload = dict(HOTEL_RESULTS, _metadata=METADATA,
+                       knowledgeGraph={"title": "Riyadh", "attributes": {"Population": "7.6M"}})
+        params = {"location": "Riyadh", "check_in": "2025-05-01", "check_out": "2025-05-03"}
+        first = SearchResultParser.process_search_results(payload, "hotel", params)
+        first[-1]["attributes"]["Population"] = "changed"
+
+        second = SearchResultParser.process_search_results(payload, "hotel", params)
+
+        self.assertEqual(second[-1]["attributes"], {"Population": "7.6M"})
+        self.assertEqual(payload["knowledgeGraph"]["attributes"], {"Population": "7.6M"})
+
+    def test_synthetic_flights(self):
+        """Test synthetic flight generation from the cheapest observed price."""
+        flights = SearchResultParser._generate_synthetic_flights(
+            "dmm", "ruh", "2025-05-01", FLIGHT_RESULTS["organic"]
+        )
+
+        self.assertEqual(len(flights), 2)
+        self.assertEqual(flights[0]["flight_number"], "SV1100")
+        self.assertEqual(flights[0]["airline"], "Saudia")
+        self.assertEqual(flights[0]["price_value"], 95)
+        self.assertEqual(flights[1]["flight_number"], "XY1101")
+        self.assertEqual(flights[1]["airline"], "flynas")
+        self.assertEqual(flights[1]["price_value"], 110)
+        self.assertTrue(all(f["synthetic"] for f in flights))
+
+    def test_find_price(self):
+        """Test the dollar price scanner against typical snippets."""
+        self.assertEqual(_find_price("Fares from $95 with flynas"), "95")
+        self.assertEqual(_find_price("Save $$ now, only $1250 round trip"), "1250")
+        self.assertEqual(_find_price("Prices in $ vary"), None)
+        self.assertEqual(_find_price("No price here"), None)
+        self.assertEqual(_find_price("$"), None)
+
+    def test_find_time_range_matches_regex(self):
+        """Test that the hand-written time scanner agrees with the time regex."""
+        samples = [
+            "Departs 07:30 AM - 08:45 AM",
+            "Departs 7:30AM–9:05PM daily",
+            "07:30 - 08:45 nonstop",
+            "Price: $120, departs 10:15 PM - 11:30 PM",
+            "Ratio 3:1 then 12:00 - 1:15 PM",
+            "123:45 - 6:78",
+            "No times listed here",
+            "Gate closes at 06:55",
+            ""
+        ]
+        for sample in samples:
+            match = _TIME_RE.search(sample)
+            expected = match.groups() if match else None
+            self.assertEqual(_find_time_range(sample), expected, sample)
+
+    def test_unknown_query_type_returns_organic(self):
+        """Test that unhandled query types return the raw organic list."""
+        results = SearchResultParser.process_search_results(FLIGHT_RESULTS, "news", {})
+        self.assertIs(results, FLIGHT_RESULTS["organic"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,573 @@
+#!/usr/bin/env python3
+"""
+Unit tests for the search tool manager.
+Tests request handling against a mocked Serper API and Redis cache.
+"""
+
+import asyncio
+import json
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import AsyncMock, MagicMock, call, patch
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import components to test
+import diskcache
+import httpx
+import redis
+
+from travel_agent.search_tools import (
+    SearchToolManager, SearchRequestException, RateLimitException, APIKeyException, SearchBudgetException,
+    MAX_SEARCH_ATTEMPTS, _extract_domain, _retry_delay
+)
+
+
+def _response(payload, status_code=200):
+    """Build a mock HTTP response."""
+    response = MagicMock()
+    response.status_code = status_code
+    response.content = json.dumps(payload).encode()
+    return response
+
+
+class TestSearchToolManager(unittest.TestCase):
+    """Test the SearchToolManager functionality."""
+
+    def setUp(self):
+        self.redis_patcher = patch("travel_agent.search_tools.redis_client")
+        self.redis = self.redis_patcher.start()
+        self.redis.get.return_value = None
+        self.redis.keys.return_value = []
+        SearchToolManager.memory_cache.clear()
+
+        with patch.dict(os.environ, {"SERPER_API_KEY": "test-key"}):
+            self.manager = SearchToolManager()
+
+    def tearDown(self):
+        self.manager.close()
+        self.redis_patcher.stop()
+
+    def test_session_default_headers(self):
+        """Test that the API key and content type are set once on the session."""
+        self.assertEqual(self.manager.session.headers["X-API-KEY"], "test-key")
+        self.assertEqual(self.manager.session.headers["Content-Type"], "application/json")
+
+        self.assertIsInstance(self.manager.session, httpx.Client)
+        self.assertEqual(self.manager.session.timeout.read, 5.0)
+
+    def test_search_reuses_session(self):
+        """Test that searches go through the pooled session without per-call headers."""
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})) as post:
+            self.manager.search("hotels in riyadh")
+            self.manager.search("hotels in jeddah")
+
+        self.assertEqual(post.call_count, 2)
+        args, kwargs = post.call_args
+        self.assertEqual(args[0], "https://google.serper.dev/search")
+        self.assertNotIn("headers", kwargs)
+        self.assertEqual(json.loads(kwargs["content"])["q"], "hotels in jeddah")
+
+    def test_search_keeps_only_used_fields(self):
+        """Test that responses are projected to the fields the processors read."""
+        payload = {
+            "searchParameters": {"q": "riyadh"},
+            "organic": [{"title": "Riyadh", "link": "https://a.com", "snippet": "s",
+                         "position": 1, "sitelinks": [{"title": "x"}]}],
+            "images": [{"title": "Kingdom Centre", "imageUrl": "https://i.com/1.jpg", "imageWidth": 800}],
+            "knowledgeGraph": {"title": "Riyadh", "description": "Capital", "imageUrl": "https://i.com/kg.jpg"},
+            "places": [{"title": "Edge of the World"}]
+        }
+        with patch.object(self.manager.session, "post", return_value=_response(payload)):
+            result = self.manager.search("riyadh")
+
+        self.assertNotIn("searchParameters", result)
+        self.assertEqual(result["organic"], [{"title": "Riyadh", "link": "https://a.com", "snippet": "s"}])
+        self.assertEqual(result["images"], [{"title": "Kingdom Centre", "imageUrl": "https://i.com/1.jpg"}])
+        self.assertEqual(result["knowledgeGraph"], {"title": "Riyadh", "description": "Capital"})
+        self.assertEqual(result["places"], payload["places"])
+        self.assertEqual(result["_metadata"]["query"], "riyadh")
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_search_retries_transient_errors(self, sleep):
+        """Test that timeouts are retried with backoff until a request succeeds."""
+        responses = [httpx.ReadTimeout("timed out"), _response({}, status_code=429), _response({"organic": []})]
+        with patch.object(self.manager.session, "post", side_effect=responses) as post:
+            result = self.manager.search("flights to riyadh")
+
+        self.assertEqual(post.call_count, 3)
+        self.assertEqual(result["organic"], [])
+        self.assertEqual([c.args[0] for c in sleep.call_args_list], [4, 4])
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_search_gives_up_after_max_attempts(self, sleep):
+        """Test that the last error is raised once all attempts are used."""
+        with patch.object(self.manager.session, "post", return_value=_response({}, status_code=429)) as post:
+            with self.assertRaises(RateLimitException):
+                self.manager.search("flights to jeddah")
+
+        self.assertEqual(post.call_count, MAX_SEARCH_ATTEMPTS)
+        self.assertEqual([_retry_delay(i) for i in range(6)], [4, 4, 8, 16, 32, 60])
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_hourly_limit_is_not_retried(self, sleep):
+        """Test that reaching the hourly call budget fails at once without calling the API."""
+        self.manager._rate_script.return_value = -1
+
+        with patch.object(self.manager.session, "post") as post:
+            with self.assertRaises(SearchBudgetException):
+                self.manager.search("flights to tabuk")
+
+        post.assert_not_called()
+        sleep.assert_not_called()
+        self.manager._rate_script.assert_called_once()
+        self.redis.decr.assert_not_called()
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_failed_calls_are_not_counted(self, sleep):
+        """Test that calls which fail are taken back off the hourly budget."""
+        self.manager._rate_script.return_value = 3
+        responses = [httpx.ReadTimeout("timed out"), _response({}, status_code=500)]
+        with patch.object(self.manager.session, "post", side_effect=responses):
+            with self.assertRaises(SearchRequestException):
+                self.manager.search("flights to sakaka")
+
+        current_bucket = self.manager._rate_script.call_args.kwargs["keys"][0]
+        self.assertEqual(self.redis.decr.call_args_list, [call(current_bucket)] * 2)
+
+    def test_rate_limit_counted_in_one_script_call(self):
+        """Test that each API call is checked and counted by one atomic script call over the minute buckets of the last hour."""
+        self.manager._rate_script.return_value = 3
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})):
+            self.manager.search("flights to hail")
+
+        self.manager._rate_script.assert_called_once()
+        call = self.manager._rate_script.call_args
+        self.assertEqual(call.kwargs["args"], [3600, 20])
+        keys = call.kwargs["keys"]
+        self.assertEqual(len(keys), 60)
+        current = int(keys[0].rsplit(":", 1)[1])
+        self.assertEqual(keys[-1], f"serper:rl:{current - 59}")
+        self.redis.incr.assert_not_called()
+        self.redis.expire.assert_not_called()
+        self.redis.decr.assert_not_called()
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_invalid_json_is_a_request_error(self, sleep):
+        """Test that an unparseable response body raises SearchRequestException without retrying."""
+        response = _response({})
+        response.content = b"<html>oops</html>"
+        with patch.object(self.manager.session, "post", return_value=response) as post:
+            with self.assertRaises(SearchRequestException):
+                self.manager.search("flights to najran")
+
+        self.assertEqual(post.call_count, 1)
+
+    @patch("travel_agent.search_tools.time.sleep")
+    def test_search_does_not_retry_other_errors(self, sleep):
+        """Test that non-transient API errors fail immediately."""
+        with patch.object(self.manager.session, "post", return_value=_response({}, status_code=500)) as post:
+            with self.assertRaises(SearchRequestException):
+                self.manager.search("flights to dubai")
+
+        self.assertEqual(post.call_count, 1)
+        sleep.assert_not_called()
+
+    def test_repeated_search_served_from_memory(self):
+        """Test that a repeated query is answered by the memory tier without Redis or HTTP."""
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})) as post:
+            first = self.manager.search("visa requirements for japan")
+            self.redis.get.reset_mock()
+            second = self.manager.search("visa requirements for japan")
+
+        self.assertEqual(post.call_count, 1)
+        self.redis.get.assert_not_called()
+        self.assertIs(second, first)
+
+    def test_memory_tier_ttl_is_capped(self):
+        """Test that the memory tier keeps entries no longer than the configured cap."""
+        self.assertEqual(self.manager._memory_ttl("visa"), 3600)
+        self.assertEqual(self.manager._memory_ttl("flights"), 3600)
+
+        with patch("travel_agent.search_tools.MEMORY_CACHE_MAX_TTL", 60):
+            self.assertEqual(self.manager._memory_ttl("visa"), 60)
+            self.assertEqual(self.manager._memory_ttl(None), 60)
+
+    def test_cache_key_normalizes_query(self):
+        """Test that case and whitespace differences map to the same cache key."""
+        key = self.manager._generate_cache_key("Hotels in  Riyadh ", "organic", "SA")
+
+        self.assertEqual(key, self.manager._generate_cache_key("hotels in riyadh", "organic", "sa"))
+        self.assertNotEqual(key, self.manager._generate_cache_key("hotels in riyadh", "images", "sa"))
+        self.assertNotEqual(key, self.manager._generate_cache_key("hotels in riyadh", "organic", None))
+
+    def test_similar_query_found_through_term_index(self):
+        """Test that saved results are indexed by term and found again without scanning keys."""
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})):
+            self.manager.search("best hotels in Riyadh for 2 people")
+
+        pipe = self.redis.pipeline.return_value
+        indexed = {c.args[0] for c in pipe.sadd.call_args_list}
+        self.assertEqual(indexed, {"idx:term:best", "idx:term:hotels", "idx:term:riyadh", "idx:term:people"})
+        # Index TTLs are only ever extended, never cut to a shorter-lived result's
+        self.assertIn(call("idx:term:best", 86400, nx=True), pipe.expire.call_args_list)
+        self.assertIn(call("idx:term:best", 86400, gt=True), pipe.expire.call_args_list)
+
+        cached = {"organic": [], "_metadata": {
+            "query": "best hotels in Riyadh", "search_type": "organic", "location": None
+        }}
+        self.redis.sinter.return_value = {b"search:cached"}
+        self.redis.mget.return_value = [json.dumps(cached).encode()]
+
+        self.assertEqual(self.manager._find_similar_query_cache("Riyadh hotels best", "organic", None), cached)
+        self.assertEqual(set(self.redis.sinter.call_args.args[0]),
+                         {"idx:term:riyadh", "idx:term:hotels", "idx:term:best"})
+        self.assertIsNone(self.manager._find_similar_query_cache("Riyadh hotels best", "images", None))
+        self.redis.keys.assert_not_called()
+        self.redis.mget.assert_called_with([b"search:cached"])
+
+        # Queries with fewer than two significant terms are not matched
+        self.redis.sinter.reset_mock()
+        self.assertIsNone(self.manager._find_similar_query_cache("riyadh", "organic", None))
+        self.redis.sinter.assert_not_called()
+
+    def _cached_candidate(self, query):
+        """Make a cached flight result for the given query the only similar-query candidate."""
+        cached = {"organic": [], "_metadata": {"query": query, "search_type": "organic", "location": None}}
+        self.redis.sinter.return_value = {b"search:cached"}
+        self.redis.mget.return_value = [json.dumps(cached).encode()]
+        return cached
+
+    def test_similar_query_keeps_route_direction(self):
+        """Test that a cached route is not served for the reverse route."""
+        cached = self._cached_candidate("flights from JED to RUH")
+
+        self.assertIsNone(self.manager._find_similar_query_cache("flights from RUH to JED", "organic", None))
+        self.assertEqual(set(self.redis.sinter.call_args.args[0]),
+                         {"idx:term:flights", "idx:term:from:ruh", "idx:term:to:jed"})
+        self.assertEqual(self.manager._find_similar_query_cache("flights to ruh from jed", "organic", None), cached)
+
+    def test_similar_query_prunes_expired_index_entries(self):
+        """Test that index entries whose result has expired are removed from the term sets."""
+        cached = {"organic": [], "_metadata": {"query": "hotels in abha", "search_type": "organic", "location": None}}
+        self.redis.sinter.return_value = [b"search:gone", b"search:cached"]
+        self.redis.mget.return_value = [None, json.dumps(cached).encode()]
+        pipe = self.redis.pipeline.return_value
+
+        self.assertEqual(self.manager._find_similar_query_cache("abha hotels", "organic", None), cached)
+
+        pipe.srem.assert_has_calls([
+            call("idx:term:abha", b"search:gone"), call("idx:term:hotels", b"search:gone")
+        ], any_order=True)
+        self.assertEqual(pipe.srem.call_count, 2)
+        pipe.execute.assert_called_once()
+
+    def test_similar_query_requires_same_terms(self):
+        """Test that a cached round trip is not served for the one-way query it contains."""
+        self._cached_candidate("flights from JED to RUH 2025-05-01 return 2025-05-08")
+
+        self.assertIsNone(self.manager._find_similar_query_cache("flights from JED to RUH 2025-05-01", "organic", None))
+
+    def test_hotel_query_maps_airport_codes(self):
+        """Test that airport codes are replaced by their city in hotel queries."""
+        self.assertEqual(self.manager._hotel_query("ruh", None, None, 1), "best hotels in Riyadh")
+        self.assertEqual(
+            self.manager._hotel_query("Abha", "2025-05-01", "2025-05-03", 2),
+            "best hotels in Abha from 2025-05-01 to 2025-05-03 for 2 people"
+        )
+
+    def test_missing_api_key_skips_similar_lookup(self):
+        """Test that a search without an API key fails before looking for similar queries."""
+        self.manager.api_key = None
+
+        with patch.object(self.manager, "_find_similar_query_cache") as similar:
+            with self.assertRaises(APIKeyException):
+                self.manager.search("hotels in riyadh downtown")
+
+        similar.assert_not_called()
+
+    def test_process_flight_results_filters(self):
+        """Test that only flight-related titles and booking providers are kept."""
+        results = {"organic": [
+            {"title": "Cheap Flights to Riyadh", "snippet": "From $120", "link": "https://www.kayak.com/r"},
+            {"title": "Riyadh city guide", "snippet": "", "link": "https://www.lonelyplanet.com/r"}
+        ]}
+
+        processed = self.manager._process_flight_results(results, "DMM", "RUH")
+
+        self.assertEqual([f["title"] for f in processed["flights"]], ["Cheap Flights to Riyadh"])
+        self.assertEqual(processed["providers"], ["kayak.com"])
+        self.assertEqual(processed["prices"]["by_provider"], {"kayak.com": "$120.00"})
+
+    def test_flight_detail_extractors(self):
+        """Test that flight details are extracted from the combined lowercased text."""
+        text = "emirates ek 123 flight departs at 10:30am flight time of 2h 30m from $1,234.50"
+
+        self.assertEqual(self.manager._extract_flight_times(text), {"departure": "10:30am"})
+        self.assertEqual(self.manager._extract_airline(text), "Emirates")
+        self.assertEqual(self.manager._extract_flight_number(text), "ek123")
+        self.assertEqual(self.manager._extract_duration(text), "2h 30m")
+        self.assertEqual(self.manager._extract_price(text), "$1,234.50")
+        self.assertEqual(self.manager._extract_airline("cheap fares on ba"), "British Airways")
+        self.assertEqual(self.manager._extract_flight_times("evening departures"), {"departure": "evening flight"})
+
+    def test_process_visa_results_official_sources(self):
+        """Test that government and embassy sites are listed as official sources."""
+        results = {"organic": [
+            {"title": "Visa rules", "snippet": "", "link": "https://visa.mofa.gov.sa/"},
+            {"title": "Visa blog", "snippet": "", "link": "https://travelblog.com/visa"}
+        ]}
+
+        processed = self.manager._process_visa_results(results, "US", "SA")
+
+        self.assertEqual([r["source"] for r in processed["official_sources"]], ["visa.mofa.gov.sa"])
+        self.assertEqual([r["source"] for r in processed["requirements"]], ["travelblog.com"])
+
+    def test_extract_domain(self):
+        """Test domain extraction and that repeated URLs are served from the memo."""
+        _extract_domain.cache_clear()
+
+        self.assertEqual(self.manager._extract_domain("https://www.expedia.com/flights"), "expedia.com")
+        self.assertEqual(self.manager._extract_domain("https://www.expedia.com/flights"), "expedia.com")
+        self.assertEqual(self.manager._extract_domain("https://kayak.com/r"), "kayak.com")
+        self.assertEqual(self.manager._extract_domain(""), "")
+        self.assertEqual(self.manager._extract_domain("http://[::1/broken"), "")
+        self.assertEqual(_extract_domain.cache_info().hits, 1)
+
+    def test_disk_fallback_when_redis_unavailable(self):
+        """Test that results are cached on disk and served from it while Redis is down."""
+        disk_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(disk_dir.cleanup)
+        disk_cache = diskcache.Cache(disk_dir.name)
+        self.addCleanup(disk_cache.close)
+        self.redis.get.side_effect = redis.exceptions.ConnectionError("redis down")
+        self.redis.pipeline.return_value.execute.side_effect = redis.exceptions.ConnectionError("redis down")
+
+        with patch("travel_agent.search_tools._get_disk_cache", return_value=disk_cache):
+            with patch.object(self.manager.session, "post", return_value=_response({"organic": []})) as post:
+                first = self.manager.search("visa requirements for egypt")
+                SearchToolManager.memory_cache.clear()
+                second = self.manager.search("visa requirements for egypt")
+
+        self.assertEqual(post.call_count, 1)
+        self.assertEqual(second, first)
+        expire_time = disk_cache.get(self.manager._generate_cache_key("visa requirements for egypt", "organic", None),
+                                     expire_time=True)[1]
+        self.assertAlmostEqual(expire_time - time.time(), 86400, delta=60)
+
+    def test_cache_ttl_by_search_kind(self):
+        """Test that results are stored in Redis with a TTL matching the kind of search."""
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})):
+            self.manager.search_visa_requirements("US", "Japan")
+            self.manager.search_weather("Riyadh")
+            self.manager.search("riyadh news")
+            self.manager.search("riyadh headlines", search_type="news")
+
+        pipe = self.redis.pipeline.return_value
+        ttls = [c.args[1] for c in pipe.setex.call_args_list]
+        self.assertEqual(pipe.execute.call_count, 4)
+        self.redis.setex.assert_not_called()
+        self.assertEqual(ttls, [604800, 3600, 86400, 1800])
+
+    def test_stats(self):
+        """Test that cache hits, misses and API latency are counted."""
+        self.assertEqual(self.manager.stats()["hit_ratio"], 0.0)
+
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})):
+            self.manager.search("hotels in medina")
+            self.manager.search("hotels in medina")
+            self.manager.search("hotels in mecca")
+            self.manager.search("hotels in medina")
+
+        stats = self.manager.stats()
+        self.assertEqual(stats["hits"], 2)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["hit_ratio"], 0.5)
+        self.assertEqual(stats["api_calls"], 2)
+        self.assertGreaterEqual(stats["avg_api_latency"], 0.0)
+        self.assertEqual(stats["memory_cache_size"], 2)
+
+    def test_memory_cache_shared_between_managers(self):
+        """Test that a new manager is served results cached by another one."""
+        with patch.object(self.manager.session, "post", return_value=_response({"organic": []})):
+            first = self.manager.search("weather in abha")
+
+        with patch.dict(os.environ, {"SERPER_API_KEY": "test-key"}):
+            other = SearchToolManager()
+        with patch.object(other.session, "post") as post:
+            self.assertIs(other.search("weather in abha"), first)
+            post.assert_not_called()
+        other.close()
+
+    def test_concurrent_identical_searches_share_request(self):
+        """Test that a search waiting on the same query reuses the in-flight request."""
+        entered = threading.Event()
+        release = threading.Event()
+
+        def post(url, content):
+            entered.set()
+            release.wait(5)
+            return _response({"organic": [{"title": "Hotel"}]})
+
+        results = []
+        with patch.object(self.manager.session, "post", side_effect=post) as mock_post:
+            leader = threading.Thread(target=lambda: results.append(self.manager.search("hotels in taif")))
+            leader.start()
+            entered.wait(5)
+            follower = threading.Thread(target=lambda: results.append(self.manager.search("hotels in taif")))
+            follower.start()
+            time.sleep(0.05)
+            release.set()
+            leader.join(5)
+            follower.join(5)
+
+        self.assertEqual(mock_post.call_count, 1)
+        self.assertEqual(len(results), 2)
+        self.assertIs(results[0], results[1])
+        self.assertEqual(self.manager._inflight, {})
+
+    def test_concurrent_identical_async_searches_share_request(self):
+        """Test that identical async searches on one loop await a single request."""
+        async def post(url, content):
+            await asyncio.sleep(0.01)
+            return _response({"organic": []})
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=post)
+
+        async def run():
+            return await asyncio.gather(
+                self.manager.async_search("things to do in alula"),
+                self.manager.async_search("Things to do in AlUla")
+            )
+
+        with patch.object(self.manager, "_async_client", return_value=client):
+            first, second = asyncio.run(run())
+
+        self.assertEqual(client.post.await_count, 1)
+        self.assertIs(first, second)
+        self.assertEqual(self.manager._async_inflight, {})
+
+    def test_async_search_keeps_redis_off_the_event_loop(self):
+        """Test that the blocking cache and rate limit calls of an async search run in worker threads."""
+        loop_threads = set()
+        redis_threads = set()
+        self.redis.get.side_effect = lambda key: redis_threads.add(threading.get_ident())
+        self.manager._rate_script.side_effect = lambda keys, args: redis_threads.add(threading.get_ident()) or 1
+        self.redis.pipeline.return_value.execute.side_effect = lambda: redis_threads.add(threading.get_ident())
+
+        async def post(url, content):
+            loop_threads.add(threading.get_ident())
+            return _response({"organic": []})
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=post)
+
+        with patch.object(self.manager, "_async_client", return_value=client):
+            asyncio.run(self.manager.async_search("museums in riyadh"))
+
+        self.assertEqual(len(loop_threads), 1)
+        self.assertTrue(redis_threads)
+        self.assertFalse(redis_threads & loop_threads)
+
+    def test_destination_info_runs_searches_concurrently(self):
+        """Test that the general and image searches are in flight together."""
+        in_flight = []
+        peak = []
+
+        async def post(url, content):
+            payload = json.loads(content)
+            in_flight.append(payload["q"])
+            peak.append(len(in_flight))
+            await asyncio.sleep(0.01)
+            in_flight.remove(payload["q"])
+            return _response({"type": payload.get("type", "organic")})
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=post)
+
+        with patch.object(self.manager, "_async_client", return_value=client):
+            results = self.manager.search_destination_info("Riyadh")
+
+        self.assertEqual(client.post.await_count, 2)
+        self.assertEqual(max(peak), 2)
+        self.assertEqual(results["general"]["type"], "organic")
+        self.assertEqual(results["images"]["type"], "images")
+        self.assertEqual(results["_metadata"]["destination"], "Riyadh")
+
+    def test_search_parallel_keeps_query_order_and_errors(self):
+        """Test that parallel searches run on the event loop and report failures per query."""
+        async def post(url, content):
+            payload = json.loads(content)
+            if payload["q"] == "broken query":
+                return _response({}, status_code=500)
+            await asyncio.sleep(0.01 if payload["q"] == "slow query" else 0)
+            return _response({"organic": [{"title": payload["q"]}]})
+
+        client = MagicMock()
+        client.post = AsyncMock(side_effect=post)
+        queries = [{"query": "slow query"}, {"query": "broken query"}, {"query": "fast query", "num_results": 3}]
+
+        with patch.object(self.manager, "_async_client", return_value=client):
+            results = self.manager.search_parallel(queries)
+
+        self.assertEqual([r["query"] for r in results], queries)
+        self.assertEqual(results[0]["result"]["organic"][0]["title"], "slow query")
+        self.assertIn("500", results[1]["error"])
+        self.assertEqual(results[2]["result"]["organic"][0]["title"], "fast query")
+
+    def test_plan_trip_gathers_all_searches(self):
+        """Test that plan_trip runs every search and reports failures per search."""
+        async def fake_search(query, search_type="organic", location=None, num_results=5, cache_tag=None):
+            if cache_tag == "weather":
+                raise SearchRequestException("weather unavailable")
+            return {"organic": [], "_metadata": {"query": query}}
+
+        with patch.object(self.manager, "async_search", side_effect=fake_search) as search:
+            trip = asyncio.run(self.manager.plan_trip(
+                origin="DMM", destination="RUH", departure_date="2025-05-01", from_country="US"
+            ))
+
+        self.assertEqual(search.call_count, 6)
+        self.assertEqual(set(trip), {"hotels", "flights", "destination_info", "weather", "visa"})
+        self.assertEqual(trip["flights"]["_query_params"]["origin"], "DMM")
+        self.assertEqual(trip["visa"]["to_country"], "RUH")
+        self.assertEqual(trip["weather"], {"error": "weather unavailable"})
+
+    def test_async_client_per_event_loop(self):
+        """Test that each event loop gets its own async client."""
+        async def get_client():
+            return self.manager._async_client()
+
+        first = asyncio.run(get_client())
+        second = asyncio.run(get_client())
+
+        self.assertIsNot(first, second)
+        self.assertEqual(len(self.manager._async_clients), 1)
+
+    def test_async_clients_shared_within_loop_across_threads(self):
+        """Test that clients are reused within a loop and separate across loops in other threads."""
+        async def get_clients():
+            return self.manager._async_client(), self.manager._async_client()
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(asyncio.run(get_clients())))
+                   for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(len(results), 3)
+        for first, second in results:
+            self.assertIs(first, second)
+        self.assertEqual(len({id(first) for first, _ in results}), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+Unit tests for session security module.
+Tests session creation, token rotation and invalidation against a mocked Redis.
+"""
+
+import unittest
+import sys
+import os
+from unittest.mock import MagicMock, call, patch
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import test utilities
+from tests.test_utils import flask_request_context, configure_test_logging
+
+# Ensure logging is properly configured
+configure_test_logging()
+
+# Import components to test
+from travel_agent.security.session_security import SessionManager, require_valid_session
+
+class TestSessionManager(unittest.TestCase):
+    """Test the SessionManager class functionality."""
+
+    def setUp(self):
+        # Create a mock Redis client
+        self.mock_redis = MagicMock()
+        self.pipe = self.mock_redis.pipeline.return_value
+        # A separate mock for each registered script
+        self.mock_redis.register_script.side_effect = lambda script: MagicMock()
+        self.manager = SessionManager(self.mock_redis)
+        self.validate_script = self.manager._validate_session
+        self.rotate_script = self.manager._rotate_token
+
+    def test_create_session_single_round_trip(self):
+        """Test that the token, session hash and token set are stored in one pipeline."""
+        with flask_request_context():
+            session_id, token = self.manager.create_session()
+
+        self.mock_redis.pipeline.assert_called_once_with(transaction=False)
+        self.pipe.execute.assert_called_once()
+        self.pipe.set.assert_called_once_with(f"travel_agent:token:{token}".encode(), session_id, ex=self.manager.token_expiry)
+        session_key = f"travel_agent:session:{session_id}".encode()
+        mapping = self.pipe.hset.call_args.kwargs['mapping']
+        self.assertEqual(self.pipe.hset.call_args.args, (session_key,))
+        self.assertEqual(set(mapping), {'created_at', 'last_access', 'last_rotation', 'ip_address', 'user_agent'})
+        zadd_key, zadd_members = self.pipe.zadd.call_args.args
+        self.assertEqual(zadd_key, session_key + b":tokens")
+        self.assertEqual(list(zadd_members), [token])
+        self.pipe.expire.assert_has_calls([
+            call(session_key, self.manager.session_expiry),
+            call(session_key + b":tokens", self.manager.session_expiry)
+        ])
+        self.mock_redis.set.assert_not_called()
+
+    def test_validate_session_in_one_script_call(self):
+        """Test that validation checks, loads and touches the session in one script call."""
+        self.validate_script.return_value = [
+            b'created_at', b'1000', b'last_access', b'1000',
+            b'ip_address', b'127.0.0.1', b'user_agent', b'test'
+        ]
+
+        with patch('travel_agent.security.session_security.time.time', return_value=1060):
+            is_valid, data = self.manager.validate_session('sid', 'tok')
+
+        self.assertTrue(is_valid)
+        self.assertEqual(data, {
+            'created_at': 1000, 'last_access': 1060,
+            'ip_address': '127.0.0.1', 'user_agent': 'test'
+        })
+        self.validate_script.assert_called_once_with(
+            keys=[b'travel_agent:token:tok', b'travel_agent:session:sid', b'travel_agent:session:sid:tokens'],
+            args=['sid', 'tok', self.manager.token_expiry, self.manager.session_expiry, 1060]
+        )
+        # Nothing else is written back
+        self.mock_redis.set.assert_not_called()
+        self.mock_redis.hset.assert_not_called()
+
+    def test_validate_session_rejections(self):
+        """Test invalid tokens, missing sessions and unlisted tokens."""
+        for result in (0, 1, 2):
+            self.validate_script.return_value = result
+            self.assertEqual(self.manager.validate_session('sid', 'tok'), (False, None))
+
+    def test_rotate_token_single_script_call(self):
+        """Test that rotation checks and swaps the token in one script call."""
+        self.rotate_script.return_value = 1
+
+        with patch('travel_agent.security.session_security.time.time', return_value=1000.5):
+            new_token = self.manager.rotate_token('sid', 'tok')
+
+        self.assertIsNotNone(new_token)
+        self.rotate_script.assert_called_once_with(
+            keys=[
+                b'travel_agent:token:tok', f"travel_agent:token:{new_token}".encode(),
+                b'travel_agent:session:sid', b'travel_agent:session:sid:tokens'
+            ],
+            args=[
+                'sid', 'tok', new_token, 1000.5,
+                self.manager.token_expiry, self.manager.session_expiry, 3, 1000
+            ]
+        )
+        # No separate validation or write round trips
+        self.validate_script.assert_not_called()
+        self.mock_redis.pipeline.assert_not_called()
+
+    def test_rotate_token_invalid_session(self):
+        """Test that an invalid session is not rotated."""
+        self.rotate_script.return_value = 0
+
+        self.assertIsNone(self.manager.rotate_token('sid', 'tok'))
+
+    def test_rotation_due(self):
+        """Test that tokens rotate only once the rotation interval has passed."""
+        with patch('travel_agent.security.session_security.time.time', return_value=1000 + self.manager.rotation_interval):
+            self.assertTrue(self.manager.rotation_due({'last_rotation': 1000}))
+            self.assertFalse(self.manager.rotation_due({'last_rotation': 1001}))
+            self.assertTrue(self.manager.rotation_due({}))
+
+    def test_require_valid_session_skips_recent_rotation(self):
+        """Test that a write request does not rotate a recently rotated token."""
+        from flask import Response
+
+        @require_valid_session(self.manager)
+        def endpoint():
+            return Response('ok')
+
+        headers = {'X-Session-ID': 'sid', 'X-Access-Token': 'tok'}
+        with patch('travel_agent.security.session_security.time.time', return_value=2000):
+            self.validate_script.return_value = [b'last_rotation', b'1990']
+            with flask_request_context(headers=headers):
+                response = endpoint()
+            self.assertNotIn('X-New-Access-Token', response.headers)
+            self.rotate_script.assert_not_called()
+
+            self.validate_script.return_value = [b'last_rotation', b'1000']
+            self.rotate_script.return_value = 1
+            with flask_request_context(headers=headers):
+                response = endpoint()
+            self.assertIn('X-New-Access-Token', response.headers)
+            self.rotate_script.assert_called_once()
+
+    def test_invalidate_session_deletes_in_one_command(self):
+        """Test that all tokens and the session are deleted together."""
+        self.pipe.execute.return_value = [1, [b'a', b'b']]
+
+        self.assertTrue(self.manager.invalidate_session('sid'))
+        self.mock_redis.unlink.assert_called_once_with(
+            b'travel_agent:token:a', b'travel_agent:token:b',
+            b'travel_agent:session:sid', b'travel_agent:session:sid:tokens'
+        )
+
+    def test_invalidate_missing_session(self):
+        """Test that invalidating an unknown session reports failure."""
+        self.pipe.execute.return_value = [0, []]
+
+        self.assertFalse(self.manager.invalidate_session('sid'))
+        self.mock_redis.unlink.assert_not_called()
+
+if __name__ == '__main__':
+    unittest.main()
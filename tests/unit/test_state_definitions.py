@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Unit tests for state definitions module.
+Tests TravelState conversation bookkeeping and parameter getters.
+"""
+
+import unittest
+import sys
+import os
+
+# Add parent directory to path for imports
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+# Import components to test
+from travel_agent.state_definitions import (
+    TravelState, LocationParameter, MAX_CONVERSATION_HISTORY
+)
+
+class TestTravelState(unittest.TestCase):
+    """Test the TravelState class functionality."""
+
+    def setUp(self):
+        self.state = TravelState(session_id="test123")
+
+    def test_conversation_history_is_bounded(self):
+        """Test that only the most recent messages and queries are kept."""
+        for i in range(MAX_CONVERSATION_HISTORY + 10):
+            self.state.add_message("user", f"query {i}")
+            self.state.add_message("assistant", f"reply {i}")
+
+        self.assertEqual(len(self.state.conversation_history), MAX_CONVERSATION_HISTORY)
+        self.assertEqual(len(self.state.user_queries), MAX_CONVERSATION_HISTORY)
+        last = MAX_CONVERSATION_HISTORY + 9
+        self.assertEqual(self.state.conversation_history[-1], {"role": "assistant", "content": f"reply {last}"})
+        self.assertEqual(self.state.get_latest_user_query(), f"query {last}")
+        self.assertEqual(self.state.user_queries[0], "query 10")
+        self.assertEqual(len(self.state.get_conversation_context(3)), 3)
+
+    def test_oversized_loaded_history_is_trimmed(self):
+        """Test that a state loaded with a longer history is trimmed on the next message."""
+        history = [{"role": "user", "content": str(i)} for i in range(MAX_CONVERSATION_HISTORY * 2)]
+        state = TravelState(session_id="test123", conversation_history=history)
+
+        state.add_message("assistant", "reply")
+
+        self.assertEqual(len(state.conversation_history), MAX_CONVERSATION_HISTORY)
+        self.assertEqual(state.conversation_history[-1]["content"], "reply")
+
+    def test_primary_destination_highest_confidence(self):
+        """Test that the first destination with the highest confidence is primary."""
+        self.assertIsNone(self.state.get_primary_destination())
+        for name, confidence in (("Paris", 0.5), ("Rome", 0.9), ("Oslo", 0.9)):
+            self.state.add_destination(LocationParameter(name=name, confidence=confidence))
+
+        self.assertEqual(self.state.get_primary_destination().name, "Rome")
+
+if __name__ == '__main__':
+    unittest.main()
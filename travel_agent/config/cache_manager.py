@@ -4,12 +4,12 @@ Implements best practices for API optimization with cache invalidation
 """
 
 import logging
-import time
 import hashlib
 import json
 from typing import Any, Dict, Optional, Callable, TypeVar, Generic, Union
 from functools import wraps
 
+from travel_agent.config.memory_cache import MemoryCache
 from travel_agent.config.redis_client import RedisManager
 from travel_agent.error_tracking import error_tracker, retry_with_tracking
 
@@ -22,51 +22,6 @@ T = TypeVar('T')
 R = TypeVar('R')
 
 
-class MemoryCache:
-    """Simple in-memory cache with TTL and max size management."""
-    
-    def __init__(self, max_size: int = 1000):
-        """Initialize the memory cache with a maximum size."""
-        self.cache = {}  # {key: (value, expiry_time)}
-        self.max_size = max_size
-    
-    def get(self, key: str) -> Optional[Any]:
-        """Get a value from the cache if it exists and hasn't expired."""
-        if key in self.cache:
-            value, expiry = self.cache[key]
-            # Check if the entry has expired
-            if expiry is None or time.time() < expiry:
-                return value
-            # Remove expired entry
-            del self.cache[key]
-        return None
-    
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        """Set a value in the cache with optional TTL in seconds."""
-        # Calculate expiry time if TTL is set
-        expiry = None if ttl is None else time.time() + ttl
-        
-        # Enforce max size by removing oldest entries if needed
-        if len(self.cache) >= self.max_size and key not in self.cache:
-            # Simple strategy: remove the first key (rough approximation of oldest)
-            # A better implementation would use LRU, but this is simpler
-            if self.cache:
-                oldest_key = next(iter(self.cache))
-                del self.cache[oldest_key]
-        
-        # Store the value with expiry time
-        self.cache[key] = (value, expiry)
-    
-    def delete(self, key: str) -> None:
-        """Delete a key from the cache if it exists."""
-        if key in self.cache:
-            del self.cache[key]
-    
-    def clear(self) -> None:
-        """Clear all entries from the cache."""
-        self.cache.clear()
-
-
 class TieredCache:
     """
     Tiered caching system that uses memory cache as L1 and Redis as L2.
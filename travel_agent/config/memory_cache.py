@@ -0,0 +1,112 @@
+"""
+Bounded in-memory cache used as the first tier in front of Redis.
+Kept free of Redis imports so it can be used by modules that create
+their own Redis connections lazily.
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from itertools import islice
+from typing import Any, Optional
+
+# Share of the least recently used entries considered for eviction
+EVICTION_SAMPLE = 0.1
+
+
+class _Entry:
+    """A cached value with its expiry, reuse weight and hit count."""
+
+    __slots__ = ("value", "expiry", "weight", "hits")
+
+    def __init__(self, value: Any, expiry: Optional[float], weight: float):
+        self.value = value
+        self.expiry = expiry
+        self.weight = weight
+        self.hits = 0
+
+
+class MemoryCache:
+    """
+    In-memory cache with per-entry TTL and a maximum size.
+
+    Eviction is value-aware LRU: among the least recently used tenth of the
+    entries, the one with the lowest weight plus hit ratio is dropped, so
+    entries that are expensive to refetch or often reused outlive one-off
+    lookups of the same age. With equal weights and no hits it is plain LRU.
+
+    Safe to share between threads; the lock is never held across I/O, so
+    coroutines can use it too.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        """Initialize the memory cache with a maximum size."""
+        # {key: _Entry}, least recently used first
+        self.cache = OrderedDict()
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.cache)
+
+    def get(self, key: str) -> Optional[Any]:
+        """Get a value from the cache if it exists and hasn't expired."""
+        with self._lock:
+            entry = self.cache.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            # Expired entries are purged lazily when they are looked up
+            if entry.expiry is not None and time.time() >= entry.expiry:
+                del self.cache[key]
+                self.misses += 1
+                return None
+
+            self.cache.move_to_end(key)
+            entry.hits += 1
+            self.hits += 1
+            return entry.value
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, weight: float = 1.0) -> None:
+        """
+        Set a value in the cache with optional TTL in seconds.
+
+        weight is the relative value of keeping the entry; higher weights
+        make it less likely to be evicted.
+        """
+        # Calculate expiry time if TTL is set
+        expiry = None if ttl is None else time.time() + ttl
+
+        with self._lock:
+            if key in self.cache:
+                self.cache.move_to_end(key)
+            elif len(self.cache) >= self.max_size:
+                self._evict()
+
+            # Store the value with expiry time
+            self.cache[key] = _Entry(value, expiry, weight)
+
+    def _evict(self) -> None:
+        """Evict the lowest value entry among the least recently used ones. Caller holds the lock."""
+        sample = max(1, int(len(self.cache) * EVICTION_SAMPLE))
+        lookups = (self.hits + self.misses) or 1
+
+        # min() keeps the first, i.e. least recent, entry on ties
+        victim = min(
+            islice(self.cache.items(), sample),
+            key=lambda item: item[1].weight + item[1].hits / lookups
+        )[0]
+        del self.cache[victim]
+
+    def delete(self, key: str) -> None:
+        """Delete a key from the cache if it exists."""
+        with self._lock:
+            self.cache.pop(key, None)
+
+    def clear(self) -> None:
+        """Clear all entries from the cache."""
+        with self._lock:
+            self.cache.clear()
@@ -4,487 +4,729 @@ Extracts structured flight and hotel information from general search results.
 """
 
 import re
-import json
+import sys
+import copy
 import logging
-from typing import Dict, Any, List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Any, List, Optional, Tuple, Union
 from datetime import datetime, timedelta
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
-class SearchResultParser:
+# Shared source labels, interned once instead of per parsed result
+_SRC_EXPEDIA, _SRC_SKYSCANNER, _SRC_GOOGLE, _SRC_KAYAK, _SRC_BOOKING, _SRC_TRAVEL = map(
+    sys.intern, ("Expedia", "Skyscanner", "Google Flights", "Kayak", "Booking.com", "Travel Search")
+)
+
+# Synthetic flight fixtures: parallel airline code/name tuples and sample departure times
+_SYN_CODES = ("SV", "XY", "F3")
+_SYN_NAMES = ("Saudia", "flynas", "flyadeal")
+_SYN_DEPARTURE_TIMES = ("07:30 AM", "10:15 AM", "01:45 PM", "04:20 PM", "08:10 PM")
+
+# Per-rank confidence decay, precomputed for the ranks that decay
+_FLIGHT_CONF = tuple(0.8 - (i * 0.05) for i in range(15))
+_HOTEL_CONF = tuple(0.9 - (i * 0.05) for i in range(15))
+_ACTIVITY_CONF = tuple(0.7 - (i * 0.05) for i in range(10))
+_SYNTH_CONF = tuple(0.7 - (i * 0.1) for i in range(3))
+
+# Precompiled extraction patterns, applied to title and snippet separately
+_FLIGHT_NUM_RE = re.compile(r'([A-Z]{2}\d+)')
+_AIRLINE_RES = (
+    re.compile(r'(Saudia|flyadeal|flynas|Saudi Arabian Airlines|SV|XY|F3)'),
+    re.compile(r'Flight\s+(SV\d+|XY\d+|F3\d+)'),
+    _FLIGHT_NUM_RE  # Generic flight number pattern
+)
+_TIME_RE = re.compile(r'(\d{1,2}:\d{2}\s*(?:AM|PM)?)\s*[-–]\s*(\d{1,2}:\d{2}\s*(?:AM|PM)?)')
+_DURATION_RE = re.compile(r'(\d+h\s*\d*m|\d+\s*hours\s*\d*\s*minutes)')
+_STAR_RE = re.compile(r'(\d+)[\-\s]star', re.IGNORECASE)
+
+def _find_price(s: str) -> Optional[str]:
     """
-    Parses search results from Serper API into structured travel data.
-    Extracts flight details, prices, and hotel information using pattern matching.
+    Return the digits of the first "$NNN" price in a string, or None.
+    
+    Matches a "$" followed by one or more digits, the same as the former price
+    regex, but uses str.find to jump between dollar signs, which avoids regex
+    overhead on short titles and snippets.
+    """
+    n = len(s)
+    i = s.find('$')
+    while i >= 0:
+        j = i + 1
+        while j < n and s[j].isdecimal():
+            j += 1
+        if j > i + 1:
+            return s[i + 1:j]
+        i = s.find('$', j)
+    return None
+
+def _find_booked_name(title: str) -> Optional[str]:
+    """
+    Return the hotel name in a "Book <name>, ..." title, or None.
+    
+    Takes the text between a "Book" word and the next comma using str.find and
+    str.partition rather than a regex; the result is already stripped.
+    """
+    n = len(title)
+    i = title.find('Book')
+    while i >= 0:
+        j = i + 4
+        if j < n and title[j].isspace():
+            name, sep, _ = title[j + 1:].partition(',')
+            if not sep:
+                return None
+            if name:
+                return name.strip()
+        i = title.find('Book', i + 1)
+    return None
+
+def _clock_end(s: str, colon: int) -> int:
+    """Return the end index of the "MM[ AM|PM]" part after `colon`, or -1 if it is not a clock."""
+    n = len(s)
+    if colon + 2 >= n or not (s[colon + 1].isdecimal() and s[colon + 2].isdecimal()):
+        return -1
+    end = colon + 3
+    while end < n and s[end].isspace():
+        end += 1
+    if s.startswith(('AM', 'PM'), end):
+        end += 2
+    return end
+
+def _find_time_range(s: str) -> Optional[Tuple[str, str]]:
     """
+    Find the first departure/arrival time range in a string.
+    
+    Hand-scans the clock token at the first colon and only falls back to
+    _TIME_RE when that token does not start a range, so text without a colon
+    never reaches the regex engine. Returns the same groups as _TIME_RE.
+    """
+    colon = s.find(':')
+    if colon < 0:
+        return None
+    
+    n = len(s)
+    if colon > 0 and s[colon - 1].isdecimal():
+        start = colon - 2 if colon >= 2 and s[colon - 2].isdecimal() else colon - 1
+        first_end = _clock_end(s, colon)
+        if first_end >= 0:
+            i = first_end
+            while i < n and s[i].isspace():
+                i += 1
+            if i < n and s[i] in '-–':
+                i += 1
+                while i < n and s[i].isspace():
+                    i += 1
+                if i + 1 < n and s[i].isdecimal():
+                    if s[i + 1] == ':':
+                        second_colon = i + 1
+                    elif s[i + 1].isdecimal() and i + 2 < n and s[i + 2] == ':':
+                        second_colon = i + 2
+                    else:
+                        second_colon = -1
+                    if second_colon >= 0:
+                        second_end = _clock_end(s, second_colon)
+                        if second_end >= 0:
+                            return s[start:first_end], s[i:second_end]
+    
+    # The first colon does not open a range; any match must start after it
+    time_match = _TIME_RE.search(s, colon + 1)
+    return time_match.groups() if time_match else None
+
+@dataclass(slots=True)
+class ParsedFlight:
+    """Compact record for one flight parsed from an organic search result."""
+    id: str
+    origin: str
+    destination: str
+    date: str
+    confidence: float
+    title: str
+    snippet: str
+    link: str
+    stops: Optional[int]
+    source: str
+    price: Optional[str] = None
+    price_value: Optional[int] = None
+    airline: Optional[str] = None
+    departure_time: Optional[str] = None
+    arrival_time: Optional[str] = None
+    duration: Optional[str] = None
+    flight_number: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the API dict shape; fields that were not found are omitted."""
+        record = {
+            "id": self.id,
+            "origin": self.origin,
+            "destination": self.destination,
+            "date": self.date,
+            "confidence": self.confidence,
+            "title": self.title,
+            "snippet": self.snippet,
+            "link": self.link,
+            "stops": self.stops,
+            "source": self.source
+        }
+        for field_name in _FLIGHT_OPTIONAL_FIELDS:
+            value = getattr(self, field_name)
+            if value is not None:
+                record[field_name] = value
+        return record
+
+@dataclass(slots=True)
+class ParsedHotel:
+    """Compact record for one hotel parsed from an organic search result."""
+    id: str
+    location: str
+    check_in: str
+    check_out: str
+    confidence: float
+    title: str
+    snippet: str
+    link: str
+    name: Optional[str] = None
+    price: Optional[str] = None
+    price_value: Optional[int] = None
+    rating: Optional[str] = None
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to the API dict shape; fields that were not found are omitted."""
+        record = {
+            "id": self.id,
+            "location": self.location,
+            "check_in": self.check_in,
+            "check_out": self.check_out,
+            "confidence": self.confidence,
+            "title": self.title,
+            "snippet": self.snippet,
+            "link": self.link
+        }
+        for field_name in _HOTEL_OPTIONAL_FIELDS:
+            value = getattr(self, field_name)
+            if value is not None:
+                record[field_name] = value
+        return record
+
+_FLIGHT_OPTIONAL_FIELDS = ("price", "price_value", "airline", "departure_time", "arrival_time",
+                           "duration", "flight_number")
+_HOTEL_OPTIONAL_FIELDS = ("name", "price", "price_value", "rating")
+
+# Parsed rows are either compact records or plain dicts (related searches, knowledge graph, ...)
+ParsedResult = Union[ParsedFlight, ParsedHotel, Dict[str, Any]]
+
+def _to_dicts(results: List[ParsedResult]) -> List[Dict[str, Any]]:
+    """Materialize parsed rows as fresh dicts at the API boundary."""
+    return [copy.deepcopy(row) if type(row) is dict else row.to_dict() for row in results]
+
+class _ParseCache:
+    """Small thread-safe LRU of parsed results, materialized as fresh dicts on every hit."""
+    
+    def __init__(self, max_size: int = 256):
+        """Initialize the cache with a maximum number of entries."""
+        self.cache = OrderedDict()  # {key: tuple of parsed rows}
+        self.max_size = max_size
+        self._lock = threading.Lock()
     
-    @staticmethod
-    def extract_flight_details(search_results: Dict[str, Any], origin: str, destination: str, date: str) -> List[Dict[str, Any]]:
-        """
-        Extract flight details from search results.
+    def get(self, key: Tuple) -> Optional[List[Dict[str, Any]]]:
+        """Return fresh dicts for the cached results of key, or None."""
+        with self._lock:
+            records = self.cache.get(key)
+            if records is None:
+                return None
+            self.cache.move_to_end(key)
+        return _to_dicts(records)
+    
+    def set(self, key: Tuple, results: List[ParsedResult]) -> None:
+        """Store parsed rows; compact records are kept as-is, dict rows are deep-copied."""
+        records = tuple(copy.deepcopy(row) if type(row) is dict else row for row in results)
+        with self._lock:
+            self.cache[key] = records
+            self.cache.move_to_end(key)
+            if len(self.cache) > self.max_size:
+                self.cache.popitem(last=False)
+    
+    def clear(self) -> None:
+        """Clear all entries from the cache."""
+        with self._lock:
+            self.cache.clear()
+
+_parse_cache = _ParseCache(max_size=256)
+
+def _payload_key(search_results: Dict[str, Any]) -> Optional[Tuple]:
+    """
+    Identify a search response by the metadata SearchToolManager stamps on it.
+    
+    The fetch timestamp tells responses to the same query apart, and survives
+    the round trip through Redis. Payloads without metadata aren't cached.
+    """
+    metadata = search_results.get("_metadata")
+    if not metadata or "timestamp" not in metadata:
+        return None
+    return (metadata.get("query"), metadata.get("search_type"), metadata.get("location"), metadata["timestamp"])
+
+def extract_flight_details(organic: List[Dict[str, Any]], origin: str, destination: str, date: str,
+                           related_searches: Optional[List[Dict[str, Any]]] = None) -> List[ParsedResult]:
+    """
+    Extract flight details from search results.
+    
+    Args:
+        organic: Organic results list from the Serper API response
+        origin: Origin airport code
+        destination: Destination airport code
+        date: Flight date (YYYY-MM-DD)
+        related_searches: Optional "relatedSearches" list from the same response
         
-        Args:
-            search_results: Raw search results from Serper API
-            origin: Origin airport code
-            destination: Destination airport code
-            date: Flight date (YYYY-MM-DD)
-            
-        Returns:
-            List of structured flight data objects
-        """
-        flights = []
+    Returns:
+        List of ParsedFlight records, followed by related-search dicts
+    """
+    flights = []
+    
+    # Get origin and destination names
+    origin_name = origin.upper()
+    destination_name = destination.upper()
+    
+    # Process ALL organic results to extract flight info
+    for i, result in enumerate(organic):
+        # Extract title and snippet to search (title first, snippet on a miss)
+        title = result.get("title", "")
+        snippet = result.get("snippet", "")
+        link = result.get("link", "")
         
-        # If no search results, return empty list
-        if not search_results or "organic" not in search_results:
-            logger.warning("No organic search results found")
-            return flights
+        # Extract stops
+        if "Nonstop" in title or "Nonstop" in snippet or "0 stops" in title or "0 stops" in snippet:
+            stops = 0
+        elif "1 stop" in title or "1 stop" in snippet:
+            stops = 1
+        elif "2 stops" in title or "2 stops" in snippet: # Can add more if needed
+            stops = 2
+        else:
+            stops = None # Unknown
         
-        # Extract flight prices from titles and snippets
-        price_pattern = r'\$(\d+)'
-        airline_patterns = [
-            r'(Saudia|flyadeal|flynas|Saudi Arabian Airlines|SV|XY|F3)',
-            r'Flight\s+(SV\d+|XY\d+|F3\d+)',
-            r'([A-Z]{2}\d+)'  # Generic flight number pattern
-        ]
-        time_pattern = r'(\d{1,2}:\d{2}\s*(?:AM|PM)?)\s*[-–]\s*(\d{1,2}:\d{2}\s*(?:AM|PM)?)'
-        duration_pattern = r'(\d+h\s*\d*m|\d+\s*hours\s*\d*\s*minutes)'
+        # Add website source
+        link_lower = link.lower()
+        if "expedia" in link_lower:
+            source = _SRC_EXPEDIA
+        elif "skyscanner" in link_lower:
+            source = _SRC_SKYSCANNER
+        elif "google" in link_lower:
+            source = _SRC_GOOGLE
+        elif "kayak" in link_lower:
+            source = _SRC_KAYAK
+        elif "booking" in link_lower:
+            source = _SRC_BOOKING
+        else:
+            source = _SRC_TRAVEL
         
-        # Get origin and destination names
-        origin_name = origin.upper()
-        destination_name = destination.upper()
+        # Always include basic information
+        flight_info = ParsedFlight(
+            id=f"flight_{i+1}",
+            origin=origin_name,
+            destination=destination_name,
+            date=date,
+            confidence=_FLIGHT_CONF[i] if i < 15 else 0.1,  # Adjusted confidence decay
+            title=title,
+            snippet=snippet,
+            link=link,
+            stops=stops,
+            source=source
+        )
         
-        # Process ALL organic results to extract flight info
-        for i, result in enumerate(search_results.get("organic", [])):
-            flight_info = {
-                "id": f"flight_{i+1}",
-                "origin": origin_name,
-                "destination": destination_name,
-                "date": date,
-                "confidence": 0.8 - (i * 0.05) if i < 15 else 0.1  # Adjusted confidence decay
-            }
-            
-            # Extract title and content to search
-            title = result.get("title", "")
-            snippet = result.get("snippet", "")
-            link = result.get("link", "")
-            content = f"{title} {snippet}"
-            
-            # Always include basic information
-            flight_info["title"] = title
-            flight_info["snippet"] = snippet
-            flight_info["link"] = link
-            
-            # Extract price
-            price_matches = re.findall(price_pattern, content)
-            if price_matches:
-                flight_info["price"] = f"${price_matches[0]}"
-                flight_info["price_value"] = int(price_matches[0])
-            
-            # Extract airline
-            for pattern in airline_patterns:
-                airline_match = re.search(pattern, content)
-                if airline_match:
-                    flight_info["airline"] = airline_match.group(1)
-                    break
-            
-            # Extract flight times
-            time_match = re.search(time_pattern, content)
-            if time_match:
-                flight_info["departure_time"] = time_match.group(1)
-                flight_info["arrival_time"] = time_match.group(2)
-            
-            # Extract duration
-            duration_match = re.search(duration_pattern, content)
-            if duration_match:
-                flight_info["duration"] = duration_match.group(1)
-            
-            # Extract flight number
-            flight_num_match = re.search(r'([A-Z]{2}\d+)', content)
-            if flight_num_match:
-                flight_info["flight_number"] = flight_num_match.group(1)
-            
-            # Extract stops
-            if "Nonstop" in content or "0 stops" in content:
-                flight_info["stops"] = 0
-            elif "1 stop" in content:
-                flight_info["stops"] = 1
-            elif "2 stops" in content: # Can add more if needed
-                flight_info["stops"] = 2
-            else:
-                flight_info["stops"] = None # Unknown
-            
-            # Add website source
-            if "expedia" in link.lower():
-                flight_info["source"] = "Expedia"
-            elif "skyscanner" in link.lower():
-                flight_info["source"] = "Skyscanner"
-            elif "google" in link.lower():
-                flight_info["source"] = "Google Flights"
-            elif "kayak" in link.lower():
-                flight_info["source"] = "Kayak"
-            elif "booking" in link.lower():
-                flight_info["source"] = "Booking.com"
-            else:
-                flight_info["source"] = "Travel Search"
-            
-            # Add every result to flights list regardless of specific flight info
-            flights.append(flight_info)
+        # Extract price
+        price_digits = _find_price(title) or _find_price(snippet)
+        if price_digits:
+            flight_info.price = f"${price_digits}"
+            flight_info.price_value = int(price_digits)
+        
+        # Extract airline and flight number. When the generic pattern supplied
+        # the airline, it is also the flight number; when no pattern matched,
+        # the generic one already failed, so there is nothing to search for.
+        for pattern in _AIRLINE_RES:
+            airline_match = pattern.search(title) or pattern.search(snippet)
+            if airline_match:
+                flight_info.airline = airline_match.group(1)
+                if pattern is _FLIGHT_NUM_RE:
+                    flight_info.flight_number = flight_info.airline
+                else:
+                    flight_num_match = _FLIGHT_NUM_RE.search(title) or _FLIGHT_NUM_RE.search(snippet)
+                    if flight_num_match:
+                        flight_info.flight_number = flight_num_match.group(1)
+                break
         
-        # Include related searches if present
-        if "relatedSearches" in search_results:
-            for i, related in enumerate(search_results.get("relatedSearches", [])):
-                related_query = related.get("query", "")
-                flights.append({
-                    "id": f"related_{i+1}",
-                    "title": f"Related Search: {related_query}",
-                    "query": related_query,
-                    "type": "related_search",
-                    "origin": origin_name,
-                    "destination": destination_name,
-                    "date": date,
-                    "confidence": 0.5
-                })
+        # Extract flight times
+        time_range = _find_time_range(title) or _find_time_range(snippet)
+        if time_range:
+            flight_info.departure_time, flight_info.arrival_time = time_range
         
-        # Only use synthetic results if we have no results at all
-        if not flights and search_results.get("organic"):
-            # Sample flight data based on the origin/destination
-            flights = SearchResultParser._generate_synthetic_flights(origin, destination, date, search_results)
+        # Extract duration
+        duration_match = _DURATION_RE.search(title) or _DURATION_RE.search(snippet)
+        if duration_match:
+            flight_info.duration = duration_match.group(1)
         
-        return flights
+        # Add every result to flights list regardless of specific flight info
+        flights.append(flight_info)
+    
+    # Include related searches if present
+    if related_searches:
+        for i, related in enumerate(related_searches):
+            related_query = related.get("query", "")
+            flights.append({
+                "id": f"related_{i+1}",
+                "title": f"Related Search: {related_query}",
+                "query": related_query,
+                "type": "related_search",
+                "origin": origin_name,
+                "destination": destination_name,
+                "date": date,
+                "confidence": 0.5
+            })
     
-    @staticmethod
-    def extract_hotel_details(search_results: Dict[str, Any], location: str, check_in: str, check_out: str) -> List[Dict[str, Any]]:
-        """
-        Extract hotel details from search results.
+    return flights
+
+def extract_hotel_details(organic: List[Dict[str, Any]], location: str, check_in: str, check_out: str,
+                          related_searches: Optional[List[Dict[str, Any]]] = None,
+                          knowledge_graph: Optional[Dict[str, Any]] = None) -> List[ParsedResult]:
+    """
+    Extract hotel details from search results.
+    
+    Args:
+        organic: Organic results list from the Serper API response
+        location: Hotel location (city)
+        check_in: Check-in date (YYYY-MM-DD)
+        check_out: Check-out date (YYYY-MM-DD)
+        related_searches: Optional "relatedSearches" list from the same response
+        knowledge_graph: Optional "knowledgeGraph" entry from the same response
         
-        Args:
-            search_results: Raw search results from Serper API
-            location: Hotel location (city)
-            check_in: Check-in date (YYYY-MM-DD)
-            check_out: Check-out date (YYYY-MM-DD)
-            
-        Returns:
-            List of structured hotel data objects
-        """
-        hotels = []
+    Returns:
+        List of ParsedHotel records, followed by related-search and knowledge graph dicts
+    """
+    hotels = []
+    
+    # Process ALL organic results
+    for i, result in enumerate(organic):
+        # Extract title and snippet to search (title first, snippet on a miss)
+        title = result.get("title", "")
+        snippet = result.get("snippet", "")
+        link = result.get("link", "")
         
-        # If no search results, return empty list
-        if not search_results or "organic" not in search_results:
-            logger.warning("No organic search results found")
-            return hotels
+        # Always include basic information
+        hotel_info = ParsedHotel(
+            id=f"hotel_{i+1}",
+            location=location,
+            check_in=check_in,
+            check_out=check_out,
+            confidence=_HOTEL_CONF[i] if i < 15 else 0.1,  # Adjusted confidence decay
+            title=title,
+            snippet=snippet,
+            link=link
+        )
         
-        # Extract hotel information
-        price_pattern = r'\$(\d+)'
-        star_pattern = r'(\d+)[\-\s]star'
-        hotel_name_pattern = r'Book\s+([^,]+),'
+        # Extract hotel name
+        hotel_name = _find_booked_name(title)
+        if hotel_name is not None:
+            hotel_info.name = hotel_name
+        else:
+            # Try to extract from title directly
+            title_parts = title.split(',')
+            if len(title_parts) > 0:
+                potential_name = title_parts[0].replace("Book", "").strip()
+                if "Hotel" in potential_name or len(potential_name.split()) <= 5:
+                    hotel_info.name = potential_name
         
-        # Process ALL organic results
-        for i, result in enumerate(search_results.get("organic", [])):
-            hotel_info = {
-                "id": f"hotel_{i+1}",
-                "location": location,
-                "check_in": check_in,
-                "check_out": check_out,
-                "confidence": 0.9 - (i * 0.05) if i < 15 else 0.1  # Adjusted confidence decay
-            }
-            
-            # Extract title and content to search
-            title = result.get("title", "")
-            snippet = result.get("snippet", "")
-            link = result.get("link", "")
-            content = f"{title} {snippet}"
-            
-            # Always include basic information
-            hotel_info["title"] = title
-            hotel_info["snippet"] = snippet
-            hotel_info["link"] = link
-            
-            # Extract hotel name
-            hotel_name_match = re.search(hotel_name_pattern, title)
-            if hotel_name_match:
-                hotel_info["name"] = hotel_name_match.group(1).strip()
-            else:
-                # Try to extract from title directly
-                title_parts = title.split(',')
-                if len(title_parts) > 0:
-                    potential_name = title_parts[0].replace("Book", "").strip()
-                    if "Hotel" in potential_name or len(potential_name.split()) <= 5:
-                        hotel_info["name"] = potential_name
-            
-            # Extract price
-            price_matches = re.findall(price_pattern, content)
-            if price_matches:
-                hotel_info["price"] = f"${price_matches[0]}"
-                hotel_info["price_value"] = int(price_matches[0])
-            
-            # Extract star rating
-            star_match = re.search(star_pattern, content.lower())
-            if star_match:
-                hotel_info["rating"] = f"{star_match.group(1)} stars"
-            
-            hotels.append(hotel_info)
+        # Extract price
+        price_digits = _find_price(title) or _find_price(snippet)
+        if price_digits:
+            hotel_info.price = f"${price_digits}"
+            hotel_info.price_value = int(price_digits)
         
-        # Include related searches if present
-        if "relatedSearches" in search_results:
-            for i, related in enumerate(search_results.get("relatedSearches", [])):
-                related_query = related.get("query", "")
-                hotels.append({
-                    "id": f"related_{i+1}",
-                    "title": f"Related Search: {related_query}",
-                    "query": related_query,
-                    "type": "related_search",
-                    "location": location,
-                    "check_in": check_in,
-                    "check_out": check_out,
-                    "confidence": 0.5
-                })
+        # Extract star rating (case-insensitive pattern, no lowercased copies)
+        star_match = _STAR_RE.search(title) or _STAR_RE.search(snippet)
+        if star_match:
+            hotel_info.rating = f"{star_match.group(1)} stars"
         
-        # If knowledgeGraph is present, include it
-        if "knowledgeGraph" in search_results:
-            kg = search_results["knowledgeGraph"]
+        hotels.append(hotel_info)
+    
+    # Include related searches if present
+    if related_searches:
+        for i, related in enumerate(related_searches):
+            related_query = related.get("query", "")
             hotels.append({
-                "id": "knowledge_graph",
-                "title": kg.get("title", "Location Information"),
-                "type": "knowledge_graph",
-                "attributes": kg.get("attributes", {}),
+                "id": f"related_{i+1}",
+                "title": f"Related Search: {related_query}",
+                "query": related_query,
+                "type": "related_search",
                 "location": location,
-                "description": kg.get("description", ""),
-                "confidence": 0.95
+                "check_in": check_in,
+                "check_out": check_out,
+                "confidence": 0.5
             })
-            
-        # Only use synthetic results if we have no results at all
-        if not hotels and search_results.get("organic"):
-            hotels = SearchResultParser._generate_synthetic_hotels(location, check_in, check_out, search_results)
+    
+    # If knowledgeGraph is present, include it
+    if knowledge_graph is not None:
+        kg = knowledge_graph
+        hotels.append({
+            "id": "knowledge_graph",
+            "title": kg.get("title", "Location Information"),
+            "type": "knowledge_graph",
+            "attributes": kg.get("attributes", {}),
+            "location": location,
+            "description": kg.get("description", ""),
+            "confidence": 0.95
+        })
         
-        return hotels
-    
-    @staticmethod
-    def extract_activity_details(search_results: Dict[str, Any], location: str) -> List[Dict[str, Any]]:
-        """
-        Extract activity and attraction details from search results.
-
-        Args:
-            search_results: Raw search results from Serper API (expected query like "things to do in [location]")
-            location: Activity location (city)
-
-        Returns:
-            List of structured activity data objects
-        """
-        activities = []
-        logger.info(f"Attempting to extract activity details for {location}...")
-
-        if not search_results or "organic" not in search_results:
-            logger.warning(f"No organic search results found for activities in {location}")
-            return activities
-
-        # Basic patterns - These need significant refinement for real-world use
-        # Looking for amounts preceded/followed by currency symbols/codes or keywords
-        cost_pattern = re.compile(r'(?:SAR|\$|£|€|USD|EGP)\s*(\d+(?:[.,]\d+)?)|(\d+(?:[.,]\d+)?)\s*(?:SAR|Dollars?|Pounds?|Euros?|EGP|Egyptian Pounds?)|(?:(?:Entry|Ticket)\s*(?:Fee|Price)\s*[:\s\-]?)\s*(?:approx\.\s*)?(?:SAR|\$|£|€|USD|EGP)?\s*(\d+(?:[.,]\d+)?)\b', re.IGNORECASE)
-        # Rough currency conversion rates (Example: update these as needed)
-        conversion_rates = {
-            "USD": 3.75,
-            "$": 3.75,
-            "EUR": 4.05,
-            "€": 4.05,
-            "GBP": 4.70,
-            "£": 4.70,
-            "EGP": 0.08, # Highly variable, example only
-            "SAR": 1.0
+    return hotels
+
+def extract_activity_details(organic: List[Dict[str, Any]], location: str) -> List[Dict[str, Any]]:
+    """
+    Extract activity and attraction details from search results.
+
+    Args:
+        organic: Organic results list from the Serper API (expected query like "things to do in [location]")
+        location: Activity location (city)
+
+    Returns:
+        List of structured activity data objects
+    """
+    activities = []
+    logger.info(f"Attempting to extract activity details for {location}...")
+
+    # Basic patterns - These need significant refinement for real-world use
+    # Looking for amounts preceded/followed by currency symbols/codes or keywords
+    cost_pattern = re.compile(r'(?:SAR|\$|£|€|USD|EGP)\s*(\d+(?:[.,]\d+)?)|(\d+(?:[.,]\d+)?)\s*(?:SAR|Dollars?|Pounds?|Euros?|EGP|Egyptian Pounds?)|(?:(?:Entry|Ticket)\s*(?:Fee|Price)\s*[:\s\-]?)\s*(?:approx\.\s*)?(?:SAR|\$|£|€|USD|EGP)?\s*(\d+(?:[.,]\d+)?)\b', re.IGNORECASE)
+    # Rough currency conversion rates (Example: update these as needed)
+    conversion_rates = {
+        "USD": 3.75,
+        "$": 3.75,
+        "EUR": 4.05,
+        "€": 4.05,
+        "GBP": 4.70,
+        "£": 4.70,
+        "EGP": 0.08, # Highly variable, example only
+        "SAR": 1.0
+    }
+
+    for i, result in enumerate(organic):
+        activity_info = {
+            "id": f"activity_{i+1}",
+            "location": location,
+            "confidence": _ACTIVITY_CONF[i] if i < 10 else 0.2, # Confidence decreases faster for generic results
+            "name": result.get("title", "Unknown Activity"),
+            "description": result.get("snippet", "No description available."),
+            "link": result.get("link", ""),
+            "cost_text": None,
+            "cost_value_sar": None
         }
 
-        for i, result in enumerate(search_results.get("organic", [])):
-            activity_info = {
-                "id": f"activity_{i+1}",
-                "location": location,
-                "confidence": 0.7 - (i * 0.05) if i < 10 else 0.2, # Confidence decreases faster for generic results
-                "name": result.get("title", "Unknown Activity"),
-                "description": result.get("snippet", "No description available."),
-                "link": result.get("link", ""),
-                "cost_text": None,
-                "cost_value_sar": None
-            }
-
-            content = f"{activity_info['name']} {activity_info['description']}"
-
-            # Extract Cost (Very basic attempt)
-            cost_matches = cost_pattern.findall(content)
-            extracted_cost_value = None
-            extracted_currency_symbol = None
-
-            if cost_matches:
-                 # Find the first non-empty capture group value
-                 for match_tuple in cost_matches:
-                     for potential_value in match_tuple:
-                         if potential_value:
-                             try:
-                                 # Clean up value (remove commas)
-                                 value_str = potential_value.replace(',', '')
-                                 extracted_cost_value = float(value_str)
-                                 activity_info["cost_text"] = f"Approx. {potential_value}" # Store raw match
-                                 # Try to guess currency (extremely basic)
-                                 # Look around the found value for currency indicators
-                                 idx = content.find(potential_value)
-                                 search_window = content[max(0, idx - 10):min(len(content), idx + len(potential_value) + 10)]
-                                 
-                                 if "SAR" in search_window: extracted_currency_symbol = "SAR"
-                                 elif "$" in search_window or "USD" in search_window or "Dollar" in search_window: extracted_currency_symbol = "$"
-                                 elif "£" in search_window or "GBP" in search_window or "Pound" in search_window: extracted_currency_symbol = "£"
-                                 elif "€" in search_window or "EUR" in search_window or "Euro" in search_window: extracted_currency_symbol = "€"
-                                 elif "EGP" in search_window or "Egyptian" in search_window: extracted_currency_symbol = "EGP"
-                                 else: extracted_currency_symbol = None # Unknown, assume local maybe?
-                                 
-                                 if extracted_currency_symbol: # Update text if symbol found
-                                    activity_info["cost_text"] = f"Approx. {extracted_currency_symbol}{potential_value}"
-                                 else:
-                                     activity_info["cost_text"] = f"Approx. {potential_value} (Currency?)"
-
-                                 # Convert to SAR if possible
-                                 rate = conversion_rates.get(extracted_currency_symbol, None) if extracted_currency_symbol else None
-                                 if rate:
-                                     activity_info["cost_value_sar"] = round(extracted_cost_value * rate, 2)
-                                 elif extracted_currency_symbol == "SAR":
-                                     activity_info["cost_value_sar"] = extracted_cost_value
-                                 else:
-                                     # If currency unknown, cannot reliably convert
-                                     logger.debug(f"Could not determine currency for cost '{potential_value}' in '{content[:100]}...'")
-
-
-                                 break # Stop after first value found in tuple
-                             except ValueError:
-                                 logger.warning(f"Could not parse cost value '{potential_value}' as float.")
-                                 extracted_cost_value = None # Reset if parsing fails
-                     if extracted_cost_value is not None:
-                         break # Stop after first match tuple yields a value
-
-            # Improve name/description (basic cleanup)
-            # Remove website names often included in titles
-            common_sites = [" - TripAdvisor", " - Viator", " - GetYourGuide", " | Visit Saudi", " - Wikipedia"]
-            for site in common_sites:
-                if activity_info["name"].endswith(site):
-                    activity_info["name"] = activity_info["name"][:-len(site)].strip()
-
-            # Basic check if the result seems relevant (contains location name?)
-            if location.lower() not in content.lower() and i > 3: # Less strict for top results
-                 activity_info["confidence"] *= 0.5 # Lower confidence if location not mentioned
-
-            # Filter out results that are clearly just booking sites or ads unless top results
-            if any(site.lower() in activity_info["name"].lower() for site in ["Booking.com", "Expedia", "Agoda", "Hotels.com"]) and i > 2:
-                logger.debug(f"Skipping likely booking site result: {activity_info['name']}")
-                continue
-
-            logger.debug(f"Extracted activity: {activity_info['name']} - Cost: {activity_info['cost_text']} SAR: {activity_info['cost_value_sar']}")
-            activities.append(activity_info)
-
-        logger.info(f"Extracted {len(activities)} potential activities for {location}.")
-        return activities
-
-    @staticmethod
-    def _generate_synthetic_flights(origin: str, destination: str, date: str, search_results: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Generate synthetic flight results when specific flight details cannot be extracted.
-        Uses information from search results to create plausible flight options.
-        
-        Args:
-            origin: Origin airport code
-            destination: Destination airport code
-            date: Flight date
-            search_results: Raw search results
-            
-        Returns:
-            List of synthetic flight data objects
-        """
-        synthetic_flights = []
-        
-        # Extract any available price information
-        min_price = None
-        price_pattern = r'\$(\d+)'
-        for result in search_results.get("organic", []):
-            content = f"{result.get('title', '')} {result.get('snippet', '')}"
-            price_matches = re.findall(price_pattern, content)
-            if price_matches:
-                price = int(price_matches[0])
-                if min_price is None or price < min_price:
-                    min_price = price
-        
-        # Default price if none found
-        if min_price is None:
-            if origin.upper() == "DMM" and destination.upper() == "RUH":
-                min_price = 38  # Default price for DMM to RUH
-            else:
-                min_price = 100  # Generic default price
+        content = f"{activity_info['name']} {activity_info['description']}"
+
+        # Extract Cost (Very basic attempt)
+        cost_matches = cost_pattern.findall(content)
+        extracted_cost_value = None
+        extracted_currency_symbol = None
+
+        if cost_matches:
+             # Find the first non-empty capture group value
+             for match_tuple in cost_matches:
+                 for potential_value in match_tuple:
+                     if potential_value:
+                         try:
+                             # Clean up value (remove commas)
+                             value_str = potential_value.replace(',', '')
+                             extracted_cost_value = float(value_str)
+                             activity_info["cost_text"] = f"Approx. {potential_value}" # Store raw match
+                             # Try to guess currency (extremely basic)
+                             # Look around the found value for currency indicators
+                             idx = content.find(potential_value)
+                             search_window = content[max(0, idx - 10):min(len(content), idx + len(potential_value) + 10)]
+                             
+                             if "SAR" in search_window: extracted_currency_symbol = "SAR"
+                             elif "$" in search_window or "USD" in search_window or "Dollar" in search_window: extracted_currency_symbol = "$"
+                             elif "£" in search_window or "GBP" in search_window or "Pound" in search_window: extracted_currency_symbol = "£"
+                             elif "€" in search_window or "EUR" in search_window or "Euro" in search_window: extracted_currency_symbol = "€"
+                             elif "EGP" in search_window or "Egyptian" in search_window: extracted_currency_symbol = "EGP"
+                             else: extracted_currency_symbol = None # Unknown, assume local maybe?
+                             
+                             if extracted_currency_symbol: # Update text if symbol found
+                                activity_info["cost_text"] = f"Approx. {extracted_currency_symbol}{potential_value}"
+                             else:
+                                 activity_info["cost_text"] = f"Approx. {potential_value} (Currency?)"
+
+                             # Convert to SAR if possible
+                             rate = conversion_rates.get(extracted_currency_symbol, None) if extracted_currency_symbol else None
+                             if rate:
+                                 activity_info["cost_value_sar"] = round(extracted_cost_value * rate, 2)
+                             elif extracted_currency_symbol == "SAR":
+                                 activity_info["cost_value_sar"] = extracted_cost_value
+                             else:
+                                 # If currency unknown, cannot reliably convert
+                                 logger.debug(f"Could not determine currency for cost '{potential_value}' in '{content[:100]}...'")
+
+
+                             break # Stop after first value found in tuple
+                         except ValueError:
+                             logger.warning(f"Could not parse cost value '{potential_value}' as float.")
+                             extracted_cost_value = None # Reset if parsing fails
+                 if extracted_cost_value is not None:
+                     break # Stop after first match tuple yields a value
+
+        # Improve name/description (basic cleanup)
+        # Remove website names often included in titles
+        common_sites = [" - TripAdvisor", " - Viator", " - GetYourGuide", " | Visit Saudi", " - Wikipedia"]
+        for site in common_sites:
+            if activity_info["name"].endswith(site):
+                activity_info["name"] = activity_info["name"][:-len(site)].strip()
+
+        # Basic check if the result seems relevant (contains location name?)
+        if location.lower() not in content.lower() and i > 3: # Less strict for top results
+             activity_info["confidence"] *= 0.5 # Lower confidence if location not mentioned
+
+        # Filter out results that are clearly just booking sites or ads unless top results
+        if any(site.lower() in activity_info["name"].lower() for site in ["Booking.com", "Expedia", "Agoda", "Hotels.com"]) and i > 2:
+            logger.debug(f"Skipping likely booking site result: {activity_info['name']}")
+            continue
+
+        logger.debug(f"Extracted activity: {activity_info['name']} - Cost: {activity_info['cost_text']} SAR: {activity_info['cost_value_sar']}")
+        activities.append(activity_info)
+
+    logger.info(f"Extracted {len(activities)} potential activities for {location}.")
+    return activities
+
+def _generate_synthetic_flights(origin: str, destination: str, date: str,
+                                organic: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Generate synthetic flight results when specific flight details cannot be extracted.
+    Uses information from search results to create plausible flight options.
+    
+    Args:
+        origin: Origin airport code
+        destination: Destination airport code
+        date: Flight date
+        organic: Organic results list from the Serper API response
         
-        # Create sample departure times
-        departure_times = ["07:30 AM", "10:15 AM", "01:45 PM", "04:20 PM", "08:10 PM"]
-        airlines = {
-            "SV": "Saudia",
-            "XY": "flynas",
-            "F3": "flyadeal"
-        }
+    Returns:
+        List of synthetic flight data objects
+    """
+    synthetic_flights = []
+    
+    # Extract any available price information
+    min_price = None
+    for result in organic:
+        price_digits = _find_price(result.get('title', '')) or _find_price(result.get('snippet', ''))
+        if price_digits:
+            price = int(price_digits)
+            if min_price is None or price < min_price:
+                min_price = price
+    
+    # Default price if none found
+    if min_price is None:
+        if origin.upper() == "DMM" and destination.upper() == "RUH":
+            min_price = 38  # Default price for DMM to RUH
+        else:
+            min_price = 100  # Generic default price
+    
+    origin_name = origin.upper()
+    destination_name = destination.upper()
+    
+    # Create 3 synthetic flights
+    for i in range(min(3, len(organic))):
+        airline_name = _SYN_NAMES[i % 3]
+        flight_number = f"{_SYN_CODES[i % 3]}{1100 + i}"
         
-        # Create 3 synthetic flights
-        for i in range(min(3, len(search_results.get("organic", [])))):
-            flight_number = f"{list(airlines.keys())[i % len(airlines)]}{1100 + i}"
-            airline_code = flight_number[:2]
-            airline_name = airlines.get(airline_code, "Saudi Airline")
-            
-            # Calculate a realistic price
-            price = min_price + (i * 15)
-            
-            # Generate flight info
-            synthetic_flights.append({
-                "id": f"flight_{i+1}",
-                "title": f"{airline_name} Flight {flight_number}",
-                "origin": origin.upper(),
-                "destination": destination.upper(),
-                "date": date,
-                "airline": airline_name,
-                "flight_number": flight_number,
-                "departure_time": departure_times[i % len(departure_times)],
-                "price": f"${price}",
-                "price_value": price,
-                "source": "Flight Search",
-                "synthetic": True,
-                "confidence": 0.7 - (i * 0.1)
-            })
+        # Calculate a realistic price
+        price = min_price + (i * 15)
         
-        return synthetic_flights
+        # Generate flight info
+        synthetic_flights.append({
+            "id": f"flight_{i+1}",
+            "title": f"{airline_name} Flight {flight_number}",
+            "origin": origin_name,
+            "destination": destination_name,
+            "date": date,
+            "airline": airline_name,
+            "flight_number": flight_number,
+            "departure_time": _SYN_DEPARTURE_TIMES[i % len(_SYN_DEPARTURE_TIMES)],
+            "price": f"${price}",
+            "price_value": price,
+            "source": "Flight Search",
+            "synthetic": True,
+            "confidence": _SYNTH_CONF[i]
+        })
     
-    @staticmethod
-    def process_search_results(search_results: Dict[str, Any], query_type: str, 
-                              params: Dict[str, Any]) -> List[Dict[str, Any]]:
-        """
-        Process search results based on the query type.
+    return synthetic_flights
+
+def process_search_results(search_results: Dict[str, Any], query_type: str, 
+                          params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Process search results based on the query type.
+    
+    Args:
+        search_results: Raw search results from Serper API
+        query_type: Type of query ('flight', 'hotel', etc.)
+        params: Query parameters
         
-        Args:
-            search_results: Raw search results from Serper API
-            query_type: Type of query ('flight', 'hotel', etc.)
-            params: Query parameters
-            
-        Returns:
-            List of structured results
-        """
-        if query_type.lower() == 'flight':
-            return SearchResultParser.extract_flight_details(
-                search_results, 
-                params.get('origin', ''), 
-                params.get('destination', ''),
-                params.get('date', '')
-            )
-        elif query_type.lower() == 'hotel':
-            return SearchResultParser.extract_hotel_details(
-                search_results,
-                params.get('location', ''),
-                params.get('check_in', ''),
-                params.get('check_out', '')
-            )
-        elif query_type.lower() == 'activity':
-            # Assuming SearchManager uses 'activity' as query_type for such searches
-            return SearchResultParser.extract_activity_details(
-                search_results,
-                params.get('location', '') # Pass the location parameter
-            )
-        else:
-            # Return the raw results for other types of queries
-            logger.info(f"Unknown query type '{query_type}' or type not handled for structured parsing. Returning raw organic results.")
-            return search_results.get("organic", [])
+    Returns:
+        List of structured result dicts (parsed records are converted here)
+    """
+    # Unwrap the organic list once; every parser below works on it directly
+    organic = (search_results.get("organic") or []) if search_results else []
+    if not organic:
+        logger.warning("No organic search results found")
+        return []
+    
+    query_type = query_type.lower()
+    if query_type == 'flight':
+        args = (params.get('origin', ''), params.get('destination', ''), params.get('date', ''))
+    elif query_type == 'hotel':
+        args = (params.get('location', ''), params.get('check_in', ''), params.get('check_out', ''))
+    elif query_type == 'activity':
+        # Assuming SearchManager uses 'activity' as query_type for such searches
+        args = (params.get('location', ''),)
+    else:
+        # Return the raw results for other types of queries
+        logger.info(f"Unknown query type '{query_type}' or type not handled for structured parsing. Returning raw organic results.")
+        return organic
+    
+    # Responses served again from the search cache (retries, replayed turns)
+    # reuse the previous parse
+    payload_key = _payload_key(search_results)
+    cache_key = (payload_key, query_type, args)
+    if payload_key is not None:
+        cached = _parse_cache.get(cache_key)
+        if cached is not None:
+            return cached
+    
+    if query_type == 'flight':
+        results = extract_flight_details(
+            organic, *args,
+            related_searches=search_results.get("relatedSearches")
+        )
+    elif query_type == 'hotel':
+        results = extract_hotel_details(
+            organic, *args,
+            related_searches=search_results.get("relatedSearches"),
+            knowledge_graph=search_results.get("knowledgeGraph")
+        )
+    else:
+        results = extract_activity_details(organic, *args)
+    
+    if payload_key is not None:
+        _parse_cache.set(cache_key, results)
+    return _to_dicts(results)
+
+
+class SearchResultParser:
+    """
+    Parses search results from Serper API into structured travel data.
+    Extracts flight details, prices, and hotel information using pattern matching.
+    
+    Kept for backwards compatibility; the parsers are module-level functions
+    and these are thin aliases to them.
+    """
+    
+    extract_flight_details = staticmethod(extract_flight_details)
+    extract_hotel_details = staticmethod(extract_hotel_details)
+    extract_activity_details = staticmethod(extract_activity_details)
+    _generate_synthetic_flights = staticmethod(_generate_synthetic_flights)
+    process_search_results = staticmethod(process_search_results)
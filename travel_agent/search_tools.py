@@ -1,14 +1,28 @@
 import os
-import json
+import re
 import time
+import asyncio
 import logging
+import threading
 import redis
 import hashlib
+import functools
 import concurrent.futures
 from typing import Dict, Any, List, Optional, Tuple
-from datetime import datetime
-import requests
-from tenacity import retry, stop_after_attempt, wait_exponential, retry_if_exception_type
+from urllib.parse import urlparse
+import httpx
+import orjson
+
+from travel_agent.config.memory_cache import MemoryCache
+
+import diskcache
+
+# HTTP/2 needs the h2 package (httpx[http2]); searches use HTTP/1.1 without it
+try:
+    import h2  # noqa: F401
+    HTTP2_ENABLED = True
+except ImportError:
+    HTTP2_ENABLED = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -23,6 +37,235 @@ redis_client = redis.from_url(
     retry_on_timeout=True
 )
 
+# On-disk fallback tier used while Redis is unreachable, so cached results
+# still survive restarts and are shared between worker processes
+DISK_CACHE_DIR = os.getenv(
+    'SEARCH_DISK_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'temp_cache', 'search')
+)
+DISK_CACHE_SIZE_LIMIT = 200 * 1024 * 1024  # 200 MB
+_disk_cache = None
+_disk_cache_lock = threading.Lock()
+
+
+# Relative value of keeping a result in the memory cache, by kind of search.
+# Visa rules and destination guides rarely change and are asked for again;
+# dated flight searches are seldom repeated.
+_CACHE_WEIGHTS = {
+    'visa': 1.0,
+    'destination': 1.0,
+    'hotels': 0.5,
+    'weather': 0.3,
+    'flights': 0.2
+}
+_DEFAULT_CACHE_WEIGHT = 0.5
+
+# Cache TTL in seconds by kind of search. Untagged searches are looked up by
+# their search type, and anything else uses cache_ttl. Flight and weather
+# results go stale fastest, but are still kept for an hour because the
+# Serper quota only allows 20 calls per hour.
+_CACHE_TTLS = {
+    'visa': 604800,         # 7 days
+    'destination': 604800,  # 7 days
+    'hotels': 21600,        # 6 hours
+    'weather': 3600,
+    'flights': 3600,
+    # Search types
+    'organic': 86400,       # 24 hours
+    'images': 604800,       # 7 days
+    'places': 604800,       # 7 days
+    'news': 1800            # 30 minutes
+}
+
+# In-process tier in front of Redis. Its TTL is capped so that entries
+# rewritten in Redis by other workers are picked up; lower the cap with
+# SEARCH_MEMORY_CACHE_TTL when many workers share one Redis.
+MEMORY_CACHE_SIZE = 1024
+MEMORY_CACHE_MAX_TTL = int(os.getenv('SEARCH_MEMORY_CACHE_TTL', '3600'))
+
+# Retry policy for rate limited, timed out or dropped search requests
+MAX_SEARCH_ATTEMPTS = 5
+
+# Serper API calls allowed in any rolling hour, counted in one-minute buckets
+SERPER_HOURLY_LIMIT = 20
+RATE_LIMIT_BUCKET_SECONDS = 60
+RATE_LIMIT_BUCKETS = 60
+
+# Atomically sums the calls over all buckets of the window (KEYS[1..n],
+# missing buckets count 0) and, while under the limit (ARGV[2]), counts a
+# call in the current bucket (KEYS[1]). Returns the total including this
+# call, or -1 without counting it when the limit is reached.
+_RATE_LIMIT_SCRIPT = """
+local total = 0
+for _, value in ipairs(redis.call('MGET', unpack(KEYS))) do
+    if value then
+        total = total + tonumber(value)
+    end
+end
+if total >= tonumber(ARGV[2]) then
+    return -1
+end
+if redis.call('INCR', KEYS[1]) == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return total + 1
+"""
+
+# Number of cache lookups between cache statistics log lines
+STATS_LOG_INTERVAL = 100
+
+# Similar-query candidates fetched per MGET round trip
+SIMILAR_QUERY_BATCH_SIZE = 500
+
+# Words ignored when matching similar queries
+_QUERY_STOPWORDS = frozenset((
+    "the", "and", "for", "with", "this", "that", "what", "when", "where", "how", "flight", "hotel"
+))
+
+# Words that give the following term a role in the query, so that a route
+# and its reverse are not taken for the same query
+_DIRECTION_WORDS = frozenset(("from", "to"))
+
+# Keyword filters for result processing, matched against lowercased text
+_FLIGHT_TITLE_RE = re.compile(r'flight|air|book|cheap|ticket')
+_FLIGHT_PROVIDER_RE = re.compile(r'expedia|kayak|booking|skyscanner|trip|flight|air')
+_WEATHER_TITLE_RE = re.compile(r'weather|forecast|temperature')
+_OFFICIAL_SOURCE_RE = re.compile(r'gov|embassy|official|ministry')
+
+# Flight detail patterns, tried in order against lowercased title and snippet text
+_FLIGHT_TIME_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'depart\w*\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',  # departs at 10:30am
+    r'departure\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',    # departure at 10:30am
+    r'leaves?\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',     # leaves at 10:30am
+    r'(\d{1,2}:\d{2}\s*(?:am|pm)?)\s+to\s+(\d{1,2}:\d{2}\s*(?:am|pm)?)',  # 10:30am to 12:45pm
+    r'(\d{1,2}(?::\d{2})?\s*(?:am|pm))\s*[-–—]\s*(\d{1,2}(?::\d{2})?\s*(?:am|pm))'  # 10:30am-12:45pm
+))
+_FLIGHT_NUMBER_PATTERNS = tuple(re.compile(pattern, re.IGNORECASE) for pattern in (
+    r'flight\s+(?:number\s+)?([A-Z]{2}\d{1,4})',  # Flight EK123
+    r'([A-Z]{2})\s*(\d{1,4})\s+flight',           # EK 123 flight
+    r'flight\s+(?:number\s+)?(\d{1,4})'           # Flight 123
+))
+_DURATION_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'(?:flight|duration|time)\s+(?:of\s+)?(\d+\s*h(?:ours?)?(?:\s*and\s*|\s*)?\d*\s*m(?:inutes?)?)',  # flight time of 2h 30m
+    r'(\d+\s*h(?:ours?)?(?:\s*and\s*|\s*)?\d*\s*m(?:inutes?)?)\s+(?:flight|duration|time)',  # 2h 30m flight time
+    r'(\d+\s*hours?(?:\s*and\s*|\s*)?\d*\s*minutes?)',  # 2 hours and 30 minutes
+    r'(?:takes|duration|time)\s+(?:of\s+)?(\d+:\d{2})'  # takes 2:30
+))
+# "price from $123" and "price from 123 usd" are found by the first two
+# patterns, so the context pattern only adds bare amounts such as "fare: 123"
+_PRICE_PATTERNS = tuple(re.compile(pattern) for pattern in (
+    r'\$\s*(\d+(?:,\d+)*(?:\.\d+)?)',  # $123 or $1,234.56
+    r'(\d+(?:,\d+)*(?:\.\d+)?)\s*usd',  # 123 USD or 1,234.56 USD
+    r'(?:price|cost|fare)\s*(?:from|:)?\s*(?:USD|\$)?\s*(\d+(?:,\d+)*(?:\.\d+)?)'  # price from 123
+))
+_DOLLAR_PRICE_RE = re.compile(r'\$\s*(\d+(?:,\d+)*(?:\.\d+)?)')
+_DIGIT_RE = re.compile(r'\d')
+_STRIP_COMMAS = str.maketrans('', '', ',')
+
+# Common airlines
+_AIRLINES = (
+    'Emirates', 'Qatar Airways', 'Etihad', 'Saudia', 'Flynas', 'Flyadeal',
+    'Turkish Airlines', 'Pegasus', 'EgyptAir', 'Air Arabia', 'Gulf Air',
+    'Royal Jordanian', 'Middle East Airlines', 'Oman Air', 'Kuwait Airways',
+    'American', 'Delta', 'United', 'Southwest', 'JetBlue', 'British Airways',
+    'Lufthansa', 'Air France', 'KLM', 'Iberia', 'Ryanair', 'easyJet',
+    'Air Canada', 'Singapore Airlines', 'Cathay Pacific', 'ANA', 'JAL'
+)
+
+# Lowercased needles to look for, as (needle, airline): each airline's name
+# followed by its initials when it has more than one word
+_AIRLINE_SEARCH = tuple(
+    (needle, airline)
+    for airline in _AIRLINES
+    for needle in (airline.lower(), ''.join(word[0] for word in airline.split()).lower())
+    if len(needle) > 1
+)
+
+# Common airport codes mapped to city names for hotel searches
+AIRPORT_TO_CITY = {
+    "BKK": "Bangkok",
+    "DMM": "Dammam",
+    "JED": "Jeddah",
+    "RUH": "Riyadh",
+    "DXB": "Dubai",
+    "AUH": "Abu Dhabi",
+    "DOH": "Doha",
+    "CAI": "Cairo",
+    "NYC": "New York City",
+    "LAX": "Los Angeles",
+    "LHR": "London",
+    "CDG": "Paris"
+}
+
+# Fields kept from each entry of a Serper response. Everything else (sitelinks,
+# positions, image dimensions, ...) is dropped before results are cached.
+_RESULT_FIELDS = {
+    'organic': ('title', 'link', 'snippet', 'thumbnail', 'date'),
+    'images': ('title', 'imageUrl', 'thumbnailUrl', 'link', 'source'),
+    'relatedSearches': ('query',)
+}
+_SECTION_FIELDS = {
+    'knowledgeGraph': ('title', 'type', 'description', 'thumbnail', 'attributes'),
+    'answerBox': ('answer', 'snippet')
+}
+# Response sections that nothing reads
+_DROPPED_SECTIONS = frozenset(('searchParameters', 'peopleAlsoAsk', 'credits'))
+
+
+def _project_results(data: Dict[str, Any]) -> Dict[str, Any]:
+    """Slim a Serper response down to the fields the result processors use."""
+    projected = {}
+    for section, value in data.items():
+        if section in _DROPPED_SECTIONS:
+            continue
+        fields = _RESULT_FIELDS.get(section)
+        if fields and isinstance(value, list):
+            value = [{f: item[f] for f in fields if f in item} for item in value]
+        else:
+            fields = _SECTION_FIELDS.get(section)
+            if fields and isinstance(value, dict):
+                value = {f: value[f] for f in fields if f in value}
+        projected[section] = value
+    return projected
+
+
+def _key_terms(query: str) -> frozenset:
+    """
+    Extract the significant terms of a query used to find similar cached queries.
+
+    A term right after a direction word is tagged with it ("from:jed", "to:ruh").
+    """
+    terms = set()
+    direction = None
+    for word in query.lower().split():
+        if word in _DIRECTION_WORDS:
+            direction = word
+            continue
+        if len(word) > 2 and word not in _QUERY_STOPWORDS:
+            terms.add(f"{direction}:{word}" if direction else word)
+        direction = None
+    return frozenset(terms)
+
+
+@functools.lru_cache(maxsize=4096)
+def _extract_domain(url: str) -> str:
+    """Extract domain name from URL, memoized since result links repeat across searches."""
+    if not url:
+        return ""
+    
+    try:
+        domain = urlparse(url).netloc
+    except ValueError:
+        # urlparse rejects malformed IPv6 hosts
+        return ""
+    # Remove 'www.' if present
+    return domain[4:] if domain.startswith('www.') else domain
+
+
+def _retry_delay(attempt: int) -> int:
+    """Exponential backoff in seconds after a failed attempt (0-based): 4, 4, 8, 16, ... up to 60."""
+    return min(60, max(4, 2 * 2 ** attempt))
+
 
 class SearchException(Exception):
     """Base exception class for search-related errors."""
@@ -34,6 +277,11 @@ class RateLimitException(SearchException):
     pass
 
 
+class SearchBudgetException(SearchException):
+    """Exception raised when the hourly budget of search API calls is used up."""
+    pass
+
+
 class APIKeyException(SearchException):
     """Exception raised when there are issues with the API key."""
     pass
@@ -44,12 +292,41 @@ class SearchRequestException(SearchException):
     pass
 
 
+def _get_disk_cache():
+    """Return the process-wide on-disk search cache."""
+    global _disk_cache
+    with _disk_cache_lock:
+        if _disk_cache is None:
+            _disk_cache = diskcache.Cache(
+                DISK_CACHE_DIR,
+                size_limit=DISK_CACHE_SIZE_LIMIT,
+                eviction_policy='least-recently-used'
+            )
+    return _disk_cache
+
+
+def _run_event_loop(loop: asyncio.AbstractEventLoop, async_clients: Dict) -> None:
+    """Run a background event loop until stopped, then close its HTTP client."""
+    asyncio.set_event_loop(loop)
+    try:
+        loop.run_forever()
+        entry = async_clients.pop(id(loop), None)
+        if entry:
+            loop.run_until_complete(entry[1].aclose())
+    finally:
+        loop.close()
+
+
 class SearchToolManager:
     """
     Manages search operations through the Google Serper API.
     Handles search queries for travel-related information.
     """
     
+    # Bounded in-process tier in front of Redis for hot queries. Shared by all
+    # managers in the process so a newly created manager starts warm.
+    memory_cache = MemoryCache(max_size=MEMORY_CACHE_SIZE)
+    
     def __init__(self, cache_enabled: bool = True):
         """
         Initialize the search tool manager.
@@ -62,346 +339,686 @@ class SearchToolManager:
             logger.warning("Serper API key not found in environment variables.")
         
         self.base_url = "https://google.serper.dev"
+        # The correct Serper API endpoint is just '/search' (no search type in the path)
+        self._search_url = f"{self.base_url}/search"
         self.cache_enabled = cache_enabled
-        self.cache_ttl = 86400  # Cache TTL in seconds (24 hours)
-        self.session = requests.Session()  # Persistent session for connection pooling
-        
-        # Configure session for better performance
-        adapter = requests.adapters.HTTPAdapter(
-            pool_connections=10,
-            pool_maxsize=20,
-            max_retries=3
+        self.cache_ttl = 86400  # Default cache TTL in seconds (24 hours)
+        self._rate_script = redis_client.register_script(_RATE_LIMIT_SCRIPT)
+        
+        # Default headers are sent with every request on this session
+        self._headers = {'Content-Type': 'application/json'}
+        if self.api_key:
+            self._headers['X-API-KEY'] = self.api_key
+        
+        # Persistent keep-alive client sized for parallel searches. With HTTP/2,
+        # requests share one TLS connection instead of paying a handshake each.
+        # httpx does not retry, so retries are only those of _fetch().
+        self.session = httpx.Client(
+            http2=HTTP2_ENABLED,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=20),
+            timeout=5.0,
+            headers=self._headers
         )
-        self.session.mount('https://', adapter)
+        
+        # Async HTTP clients are bound to the event loop they were created on,
+        # so one is kept per loop. Sync wrappers run on a private background loop.
+        self._async_clients: Dict[int, Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_lock = threading.Lock()
+        
+        # Searches currently waiting on the API, by cache key
+        self._inflight: Dict[str, concurrent.futures.Future] = {}
+        self._inflight_lock = threading.Lock()
+        self._async_inflight: Dict[Tuple[int, str], asyncio.Task] = {}
+        
+        # Cache and API counters, see stats()
+        self._stats = {'hits': 0, 'misses': 0, 'api_calls': 0, 'api_latency_sum': 0.0}
+        self._stats_lock = threading.Lock()
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return cache and API statistics for this manager.
+        
+        Returns:
+            Dictionary with hit_ratio, avg_api_latency (seconds), the raw
+            counters and the size of the shared memory cache
+        """
+        with self._stats_lock:
+            counters = dict(self._stats)
+        lookups = counters['hits'] + counters['misses']
+        return {
+            'hit_ratio': counters['hits'] / lookups if lookups else 0.0,
+            'avg_api_latency': counters['api_latency_sum'] / max(1, counters['api_calls']),
+            'memory_cache_size': len(self.memory_cache),
+            **counters
+        }
+    
+    def _record_lookup(self, hit: bool) -> None:
+        """Count a cache lookup and periodically log the statistics."""
+        with self._stats_lock:
+            self._stats['hits' if hit else 'misses'] += 1
+            lookups = self._stats['hits'] + self._stats['misses']
+        if lookups % STATS_LOG_INTERVAL == 0:
+            stats = self.stats()
+            logger.info(
+                f"Search cache stats: {stats['hit_ratio']:.1%} hit ratio over {lookups} lookups, "
+                f"{stats['api_calls']} API calls averaging {stats['avg_api_latency']:.3f}s"
+            )
+    
+    def close(self) -> None:
+        """Close pooled HTTP connections held by this manager."""
+        self.session.close()
+        
+        # Stopping the background loop also closes its async client
+        loop, self._loop = self._loop, None
+        if loop is not None and not loop.is_closed():
+            loop.call_soon_threadsafe(loop.stop)
+    
+    def __del__(self):
+        try:
+            self.close()
+        except Exception:
+            pass
     
-    def _generate_cache_key(self, query: str, search_type: str, location: Optional[str]) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=2048)
+    def _generate_cache_key(query: str, search_type: str, location: Optional[str]) -> str:
         """Generate a unique key for caching search results."""
-        location_str = location if location else "global"
+        # Normalize case and whitespace so equivalent queries share an entry
+        normalized_query = " ".join(query.lower().split())
+        location_str = location.lower() if location else "global"
         # Create a hash of the query parameters for shorter keys
-        combined = f"{query}::{search_type}::{location_str}"
-        return f"search:{hashlib.md5(combined.encode()).hexdigest()}"
+        combined = f"{normalized_query}::{search_type}::{location_str}"
+        return f"search:{hashlib.blake2b(combined.encode(), digest_size=16).hexdigest()}"
+        
+    def _index_query_terms(self, pipe, cache_key: str, data: Dict, ttl: int) -> None:
+        """Queue adding a cached result to the per-term index sets used by _find_similar_query_cache."""
+        metadata = data.get('_metadata') or {}
+        query = metadata.get('query')
+        if not query:
+            return
+        
+        for term in _key_terms(query):
+            index_key = f"idx:term:{term}"
+            pipe.sadd(index_key, cache_key)
+            # A set is shared by results with different TTLs, so its TTL is
+            # only ever extended: NX covers a new set, GT an existing one
+            pipe.expire(index_key, ttl, nx=True)
+            pipe.expire(index_key, ttl, gt=True)
+    
+    def _prune_query_index(self, key_terms: frozenset, expired_keys: List) -> None:
+        """Remove expired cache keys from the index sets of the given terms."""
+        pipe = redis_client.pipeline(transaction=False)
+        for term in key_terms:
+            pipe.srem(f"idx:term:{term}", *expired_keys)
+        pipe.execute()
         
     def _find_similar_query_cache(self, query: str, search_type: str, location: Optional[str]) -> Optional[Dict]:
-        """Find cached results for similar queries to reduce API calls."""
+        """
+        Find cached results for similar queries to reduce API calls.
+        
+        Candidates come from the per-term index sets written by _save_to_cache,
+        so the lookup never walks the keyspace. A candidate must have exactly the
+        significant terms of the query and match its search type and location.
+        """
         if not self.cache_enabled:
             return None
             
         try:
-            # Get all search cache keys
-            search_keys = redis_client.keys("search:*")
+            # A single shared term says too little about the query to reuse
+            # another one's results, so short queries skip the lookup
+            key_terms = _key_terms(query)
+            if len(key_terms) < 2:
+                return None
             
-            # Clean the query for comparison (lowercase, remove extra spaces)
-            clean_query = " ".join(query.lower().split())
+            # Cache keys whose query contains all of the key terms
+            candidates = list(redis_client.sinter([f"idx:term:{term}" for term in key_terms]))
             
-            # Extract key terms from the query
-            query_terms = set(clean_query.split())
-            key_terms = {word for word in query_terms if len(word) > 3 and word not in {
-                "from", "to", "the", "and", "for", "with", "this", "that", "what", "when", "where", "how", "flight", "hotel"
-            }}
-            
-            for key in search_keys:
-                # Get the cached data
-                cached_data = redis_client.get(key)
-                if not cached_data:
-                    continue
+            # Fetch the candidates in batches of one round trip each
+            for start in range(0, len(candidates), SIMILAR_QUERY_BATCH_SIZE):
+                batch = candidates[start:start + SIMILAR_QUERY_BATCH_SIZE]
+                values = redis_client.mget(batch)
+                
+                # Index entries outlive expired results, so drop the ones
+                # whose key is gone before the sets grow without bound
+                expired_keys = [key for key, value in zip(batch, values) if value is None]
+                if expired_keys:
+                    self._prune_query_index(key_terms, expired_keys)
+                
+                for cached_data in values:
+                    if not cached_data:
+                        continue
                     
-                try:
-                    data = json.loads(cached_data)
-                    # Check if this is a relevant cache entry
-                    if "query" in data and search_type in data.get("type", ""):
-                        cached_query = data["query"].lower()
-                        
-                        # Check for significant term overlap
-                        cached_terms = set(cached_query.split())
-                        key_cached_terms = {word for word in cached_terms if len(word) > 3}
-                        
-                        # If there's significant overlap in key terms, use this cache
-                        overlap = key_terms.intersection(key_cached_terms)
-                        if len(overlap) >= min(2, len(key_terms)):
-                            logger.info(f"Found similar query cache: {data['query']} for query: {query}")
-                            return data
-                except:
-                    continue
+                    try:
+                        data = orjson.loads(cached_data)
+                    except orjson.JSONDecodeError:
+                        continue
+                    
+                    # Candidates may have more terms than the query, such as a
+                    # return date, and those answer a different question
+                    metadata = data.get('_metadata') or {}
+                    if (metadata.get('search_type') == search_type and metadata.get('location') == location
+                            and _key_terms(metadata.get('query') or '') == key_terms):
+                        logger.info(f"Found similar query cache: {metadata.get('query')} for query: {query}")
+                        return data
                     
             return None
-        except Exception as e:
+        except redis.exceptions.RedisError as e:
             logger.warning(f"Error finding similar query cache: {str(e)}")
             return None
     
-    def _get_from_cache(self, cache_key: str) -> Optional[Dict]:
-        """Get results from Redis cache if they exist and are valid."""
+    def _cache_ttl(self, cache_tag: Optional[str]) -> int:
+        """TTL in seconds for results of the given kind of search."""
+        return _CACHE_TTLS.get(cache_tag, self.cache_ttl)
+    
+    def _memory_ttl(self, cache_tag: Optional[str]) -> int:
+        """TTL for the in-process tier, capped so Redis stays the source of truth."""
+        return min(self._cache_ttl(cache_tag), MEMORY_CACHE_MAX_TTL)
+    
+    def _get_from_cache(self, cache_key: str, cache_tag: Optional[str] = None) -> Optional[Dict]:
+        """
+        Get results from the memory or Redis cache if they exist and are valid.
+        Falls back to the on-disk cache when Redis is unreachable.
+        """
         if not self.cache_enabled:
             return None
+        
+        cached_result = self.memory_cache.get(cache_key)
+        if cached_result is not None:
+            logger.debug(f"Memory cache hit for key: {cache_key}")
+            return cached_result
             
         try:
             cached_data = redis_client.get(cache_key)
             if cached_data:
                 logger.info(f"Cache hit for key: {cache_key}")
-                return json.loads(cached_data)
+                result = orjson.loads(cached_data)
+                self._save_to_memory(cache_key, result, cache_tag)
+                return result
             return None
         except Exception as e:
             logger.warning(f"Error accessing cache: {str(e)}")
+            return self._get_from_disk(cache_key, cache_tag)
+    
+    def _get_from_disk(self, cache_key: str, cache_tag: Optional[str]) -> Optional[Dict]:
+        """Get results from the on-disk fallback cache."""
+        try:
+            result = _get_disk_cache().get(cache_key)
+        except Exception as e:
+            logger.warning(f"Error accessing disk cache: {str(e)}")
             return None
+        
+        if result is not None:
+            logger.info(f"Disk cache hit for key: {cache_key}")
+            self._save_to_memory(cache_key, result, cache_tag)
+        return result
+    
+    def _save_to_disk(self, cache_key: str, data: Dict, cache_tag: Optional[str]) -> None:
+        """Save results to the on-disk fallback cache with TTL."""
+        try:
+            _get_disk_cache().set(cache_key, data, expire=self._cache_ttl(cache_tag))
+        except Exception as e:
+            logger.warning(f"Error saving to disk cache: {str(e)}")
             
-    def _save_to_cache(self, cache_key: str, data: Dict) -> None:
-        """Save results to Redis cache with TTL."""
+    def _save_to_memory(self, cache_key: str, data: Dict, cache_tag: Optional[str]) -> None:
+        """Save results to the memory cache, weighted by the kind of search."""
+        weight = _CACHE_WEIGHTS.get(cache_tag, _DEFAULT_CACHE_WEIGHT)
+        self.memory_cache.set(cache_key, data, ttl=self._memory_ttl(cache_tag), weight=weight)
+    
+    def _save_to_cache(self, cache_key: str, data: Dict, cache_tag: Optional[str] = None) -> None:
+        """Save results to the memory and Redis caches with TTL."""
         if not self.cache_enabled:
             return
+        
+        self._save_to_memory(cache_key, data, cache_tag)
             
         try:
-            redis_client.setex(cache_key, self.cache_ttl, json.dumps(data))
+            # The result and its index entries are written in one round trip
+            ttl = self._cache_ttl(cache_tag)
+            pipe = redis_client.pipeline(transaction=False)
+            pipe.setex(cache_key, ttl, orjson.dumps(data))
+            self._index_query_terms(pipe, cache_key, data, ttl)
+            pipe.execute()
             logger.info(f"Saved to cache: {cache_key}")
         except Exception as e:
             logger.warning(f"Error saving to cache: {str(e)}")
+            self._save_to_disk(cache_key, data, cache_tag)
+    
+    def _lookup_cache(self, cache_key: str, query: str, search_type: str,
+                      location: Optional[str], cache_tag: Optional[str]) -> Optional[Dict]:
+        """Return a cached result for the query, falling back to a similar query."""
+        # Check the memory and Redis caches first if enabled
+        cached_result = self._get_from_cache(cache_key, cache_tag)
+        if cached_result:
+            self._record_lookup(hit=True)
+            return cached_result
+            
+        # Without an API key the search fails next anyway, and without the
+        # cache there is nothing similar to find
+        if not self.api_key or not self.cache_enabled:
+            self._record_lookup(hit=False)
+            return None
+        
+        # Try to find similar query in cache
+        similar_result = self._find_similar_query_cache(query, search_type, location)
+        if similar_result:
+            # Save this result under the current query's cache key for future direct hits
+            self._save_to_cache(cache_key, similar_result, cache_tag)
+            self._record_lookup(hit=True)
+            return similar_result
+        
+        self._record_lookup(hit=False)
+        return None
+    
+    def _reserve_api_call(self) -> Optional[str]:
+        """
+        Count an API call against the rolling hourly budget.
+        
+        The budget is checked and the counter incremented atomically before
+        the call, so concurrent searches cannot both pass the check on the
+        same count, and rejected calls are never counted. Summing
+        one-minute buckets avoids the burst a fixed hourly window allows
+        around the top of the hour.
+        
+        Returns:
+            The key of the bucket the call was counted in, for _release_api_call,
+            or None if the budget couldn't be checked
+        
+        Raises:
+            SearchBudgetException: If the hourly budget is used up
+        """
+        keys = self._rate_limit_keys()
+        try:
+            call_count = int(self._rate_script(
+                keys=keys,
+                args=[RATE_LIMIT_BUCKET_SECONDS * RATE_LIMIT_BUCKETS, SERPER_HOURLY_LIMIT]
+            ))
+        except (redis.exceptions.RedisError, ValueError) as e:
+            logger.warning(f"Error checking rate limits: {str(e)}")
+            # Continue with the request even if rate limit checking fails
+            return None
+        
+        # Waiting out the backoff wouldn't free up budget, so this isn't retried
+        if call_count < 0:
+            logger.error(f"Rate limit reached: {SERPER_HOURLY_LIMIT} calls in the last hour")
+            raise SearchBudgetException("Serper API rate limit reached for this hour")
+        
+        logger.info(f"Serper API usage: {call_count}/{SERPER_HOURLY_LIMIT} calls in the last hour")
+        
+        if call_count >= 15:
+            logger.warning(f"Approaching rate limit: {call_count}/{SERPER_HOURLY_LIMIT} calls in the last hour")
+        
+        return keys[0]
+    
+    def _release_api_call(self, bucket_key: Optional[str]) -> None:
+        """Give back a call counted by _reserve_api_call that failed."""
+        if bucket_key is None:
+            return
+        
+        try:
+            redis_client.decr(bucket_key)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Error releasing rate limit count: {str(e)}")
+    
+    def _build_payload(self, query: str, search_type: str, location: Optional[str],
+                       num_results: int) -> Dict[str, Any]:
+        """Build the Serper API request payload."""
+        return {
+            'q': query,
+            'gl': location or 'us',  # Geolocation parameter, global searches use 'us'
+            'hl': 'en',  # Language parameter
+            'autocorrect': True,
+            'num': min(num_results, 10),  # Limit number of results to improve speed
+            # Add search type as a parameter in the payload if not 'organic'
+            **({'type': search_type} if search_type != 'organic' else {})
+        }
+    
+    def _handle_response(self, response, query: str, search_type: str,
+                         location: Optional[str], latency: float) -> Dict[str, Any]:
+        """Check the HTTP status of a Serper response and return its annotated body."""
+        with self._stats_lock:
+            self._stats['api_calls'] += 1
+            self._stats['api_latency_sum'] += latency
+        
+        # Handle HTTP errors
+        if response.status_code == 429:
+            logger.warning("Serper API rate limit exceeded")
+            raise RateLimitException("Search API rate limit exceeded")
+        
+        elif response.status_code == 401 or response.status_code == 403:
+            logger.error("Serper API key invalid or unauthorized")
+            raise APIKeyException("Invalid or unauthorized API key")
+        
+        elif response.status_code != 200:
+            logger.error(f"Serper API error: {response.status_code}")
+            raise SearchRequestException(f"Search API returned error: {response.status_code}")
+        
+        # Parse successful response, keeping only the fields that are used
+        try:
+            result = _project_results(orjson.loads(response.content))
+        except orjson.JSONDecodeError as e:
+            logger.error(f"Invalid JSON in Serper API response: {str(e)}")
+            raise SearchRequestException(f"Search API returned invalid JSON: {str(e)}")
+        
+        # Add metadata to the result
+        result['_metadata'] = {
+            'query': query,
+            'search_type': search_type,
+            'location': location,
+            'latency': latency,
+            'timestamp': time.time()
+        }
+        
+        return result
+    
+    def _rate_limit_keys(self) -> List[str]:
+        """Return the Redis keys of the rate limit buckets in the window, current bucket first."""
+        current_bucket = int(time.time()) // RATE_LIMIT_BUCKET_SECONDS
+        return [f"serper:rl:{current_bucket - i}" for i in range(RATE_LIMIT_BUCKETS)]
     
-    @retry(
-        retry=retry_if_exception_type((RateLimitException, requests.exceptions.Timeout, 
-                                       requests.exceptions.ConnectionError)),
-        stop=stop_after_attempt(5),  # Increase max retry attempts
-        wait=wait_exponential(multiplier=2, min=4, max=60)  # More aggressive backoff strategy
-    )
     def search(
         self, 
         query: str, 
         search_type: str = 'organic', 
         location: Optional[str] = None,
-        num_results: int = 5
+        num_results: int = 5,
+        cache_tag: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Perform a search using Google Serper API.
         
+        Rate limit, timeout and connection errors are retried with exponential backoff.
+        
         Args:
             query: Search query string
             search_type: Type of search ('organic', 'places', 'images', 'news')
             location: Optional location for geographically relevant results
             num_results: Number of results to return
+            cache_tag: Kind of search ('flights', 'hotels', 'destination', 'weather',
+                       'visa') that sets how long the result is cached and how it
+                       is weighed in the memory cache. Defaults to the search type.
             
         Returns:
             Dictionary containing search results
             
         Raises:
             RateLimitException: If API rate limits are exceeded
+            SearchBudgetException: If the hourly budget of API calls is used up
             APIKeyException: If there are issues with the API key
             SearchRequestException: For other request errors
         """
+        cache_tag = cache_tag or search_type
+        
         # Generate cache key
         cache_key = self._generate_cache_key(query, search_type, location)
         
-        # Check Redis cache first if enabled
-        cached_result = self._get_from_cache(cache_key)
+        cached_result = self._lookup_cache(cache_key, query, search_type, location, cache_tag)
         if cached_result:
             return cached_result
-            
-        # Try to find similar query in cache
-        similar_result = self._find_similar_query_cache(query, search_type, location)
-        if similar_result:
-            # Save this result under the current query's cache key for future direct hits
-            self._save_to_cache(cache_key, similar_result)
-            return similar_result
-            
-        # Check rate limiting before making API call
-        rate_limit_key = "serper_api_rate_limit"
-        current_hour = datetime.now().strftime("%Y-%m-%d-%H")
-        hourly_key = f"{rate_limit_key}:{current_hour}"
-        
-        # Get current count of API calls this hour
-        try:
-            call_count = redis_client.get(hourly_key)
-            call_count = int(call_count) if call_count else 0
-            
-            # If we're approaching the limit (20 per hour), wait longer between calls
-            if call_count >= 15:
-                logger.warning(f"Approaching rate limit: {call_count}/20 calls this hour")
-                time.sleep(5)  # Add delay to spread out requests
-                
-            # If we're at or over the limit, raise exception to trigger retry with backoff
-            if call_count >= 19:
-                logger.error(f"Rate limit reached: {call_count}/20 calls this hour")
-                raise RateLimitException("Serper API rate limit reached for this hour")
-        except Exception as e:
-            logger.warning(f"Error checking rate limits: {str(e)}")
-            # Continue with the request even if rate limit checking fails
         
         # Proceed with API request if no valid cache found
         if not self.api_key:
             raise APIKeyException("Serper API key not configured")
         
-        headers = {
-            'X-API-KEY': self.api_key,
-            'Content-Type': 'application/json'
-        }
-        
-        payload = {
-            'q': query,
-            'gl': 'us',  # Geolocation parameter - could be dynamically set
-            'hl': 'en',  # Language parameter
-            'autocorrect': True,
-            'num': min(num_results, 10)  # Limit number of results to improve speed
-        }
-        
-        if location:
-            payload['gl'] = location
+        payload = self._build_payload(query, search_type, location, num_results)
         
-        # The correct Serper API endpoint is just '/search' (no search type in the path)
-        endpoint = "/search"
-        url = f"{self.base_url}{endpoint}"
+        # Coalesce concurrent identical searches onto the request already in flight
+        with self._inflight_lock:
+            future = self._inflight.get(cache_key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._inflight[cache_key] = future
+        if not leader:
+            logger.debug(f"Waiting for in-flight search: {cache_key}")
+            return future.result()
         
-        # Add search type as a parameter in the payload if not 'organic'
-        if search_type != 'organic':
-            payload['type'] = search_type
+        try:
+            result = self._fetch(payload, cache_key, search_type, location, cache_tag)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._inflight_lock:
+                del self._inflight[cache_key]
+    
+    def _fetch(self, payload: Dict[str, Any], cache_key: str, search_type: str,
+               location: Optional[str], cache_tag: Optional[str]) -> Dict[str, Any]:
+        """Request a search from the API, retrying transient failures with backoff."""
+        for attempt in range(MAX_SEARCH_ATTEMPTS):
+            try:
+                return self._post_search(payload, cache_key, search_type, location, cache_tag)
+            except (RateLimitException, httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt == MAX_SEARCH_ATTEMPTS - 1:
+                    raise
+                delay = _retry_delay(attempt)
+                logger.info(f"Retrying search in {delay}s after {type(e).__name__}")
+                time.sleep(delay)
+    
+    def _post_search(self, payload: Dict[str, Any], cache_key: str, search_type: str,
+                     location: Optional[str], cache_tag: Optional[str]) -> Dict[str, Any]:
+        """Send one search request to the Serper API and cache the result."""
+        # Count the call against the hourly budget before making it
+        bucket_key = self._reserve_api_call()
         
         try:
-            start_time = time.time()
-            response = self.session.post(
-                f"{self.base_url}{endpoint}", 
-                headers=headers, 
-                json=payload,
-                timeout=5  # Reduced timeout for faster API requests
-            )
-            end_time = time.time()
-            
-            # Handle HTTP errors
-            if response.status_code == 429:
-                logger.warning("Serper API rate limit exceeded")
-                raise RateLimitException("Search API rate limit exceeded")
-            
-            elif response.status_code == 401 or response.status_code == 403:
-                logger.error("Serper API key invalid or unauthorized")
-                raise APIKeyException("Invalid or unauthorized API key")
-            
-            elif response.status_code != 200:
-                logger.error(f"Serper API error: {response.status_code}")
-                raise SearchRequestException(f"Search API returned error: {response.status_code}")
-            
-            # Parse successful response
-            result = response.json()
-            
-            # Add metadata to the result
-            result['_metadata'] = {
-                'query': query,
-                'search_type': search_type,
-                'location': location,
-                'latency': end_time - start_time,
-                'timestamp': time.time()
-            }
-            
-            # Cache the successful result in Redis
-            self._save_to_cache(cache_key, result)
-            
-            # Increment the API call counter for rate limiting
             try:
-                # Increment counter and set expiry to ensure it resets after the hour
-                redis_client.incr(hourly_key)
-                redis_client.expire(hourly_key, 3600)  # Expire after 1 hour
+                start_time = time.time()
+                response = self.session.post(self._search_url, content=orjson.dumps(payload))
+                end_time = time.time()
                 
-                # Log current usage
-                new_count = redis_client.get(hourly_key)
-                new_count = int(new_count) if new_count else 1
-                logger.info(f"Serper API usage: {new_count}/20 calls this hour")
+            # Timeouts and connection errors propagate so the request is retried
+            except httpx.TimeoutException:
+                logger.warning("Serper API request timed out")
+                raise
                 
-                # If we're getting close to the limit, increase cache TTL to reduce future calls
-                if new_count >= 15:
-                    self.cache_ttl = 172800  # 48 hours when approaching limits
-            except Exception as e:
-                logger.warning(f"Error updating rate limit counter: {str(e)}")
-            
-            return result
+            except httpx.NetworkError:
+                logger.warning("Connection error when accessing Serper API")
+                raise
+                
+            except httpx.HTTPError as e:
+                logger.error(f"Error in search request: {str(e)}")
+                raise SearchRequestException(f"Search failed: {str(e)}")
             
-        except (RateLimitException, APIKeyException):
-            # Re-raise these specific exceptions to be handled separately
+            result = self._handle_response(response, payload['q'], search_type, location,
+                                           end_time - start_time)
+        except BaseException:
+            # Failed calls don't use up the hourly budget
+            self._release_api_call(bucket_key)
             raise
+        
+        # Cache the successful result in Redis
+        self._save_to_cache(cache_key, result, cache_tag)
+        
+        return result
+    
+    def _async_client(self) -> httpx.AsyncClient:
+        """Return the async HTTP client bound to the running event loop."""
+        loop = asyncio.get_running_loop()
+        entry = self._async_clients.get(id(loop))
+        if entry is None or entry[0] is not loop:
+            # Forget clients whose event loops have been closed
+            for loop_id, (client_loop, _) in list(self._async_clients.items()):
+                if client_loop.is_closed():
+                    self._async_clients.pop(loop_id, None)
             
-        except requests.exceptions.Timeout:
-            logger.warning("Serper API request timed out")
-            raise
+            # With HTTP/2, concurrent searches such as plan_trip's are
+            # multiplexed over a single connection
+            client = httpx.AsyncClient(
+                http2=HTTP2_ENABLED,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                timeout=5.0,
+                headers=self._headers
+            )
+            entry = (loop, client)
+            self._async_clients[id(loop)] = entry
+        return entry[1]
+    
+    def _run_coroutine(self, coro):
+        """Run a coroutine to completion on this manager's background event loop."""
+        with self._loop_lock:
+            if self._loop is None:
+                self._loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=_run_event_loop,
+                    args=(self._loop, self._async_clients),
+                    name="search-tools-loop",
+                    daemon=True
+                ).start()
+            loop = self._loop
+        return asyncio.run_coroutine_threadsafe(coro, loop).result()
+    
+    async def async_search(
+        self, 
+        query: str, 
+        search_type: str = 'organic', 
+        location: Optional[str] = None,
+        num_results: int = 5,
+        cache_tag: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Perform a search using Google Serper API without blocking the event loop.
+        
+        Takes the same arguments, returns the same results and raises the same
+        exceptions as search(). Redis and disk cache calls block, so they run
+        in a worker thread.
+        """
+        cache_tag = cache_tag or search_type
+        
+        cache_key = self._generate_cache_key(query, search_type, location)
+        
+        # Memory cache hits are answered without leaving the event loop
+        cached_result = self.memory_cache.get(cache_key) if self.cache_enabled else None
+        if cached_result is not None:
+            self._record_lookup(hit=True)
+            return cached_result
+        
+        cached_result = await asyncio.to_thread(
+            self._lookup_cache, cache_key, query, search_type, location, cache_tag
+        )
+        if cached_result:
+            return cached_result
+        
+        if not self.api_key:
+            raise APIKeyException("Serper API key not configured")
+        
+        payload = self._build_payload(query, search_type, location, num_results)
+        
+        # Coalesce concurrent identical searches on this loop onto one request.
+        # Waiters are shielded so a cancelled caller doesn't cancel the others.
+        inflight_key = (id(asyncio.get_running_loop()), cache_key)
+        task = self._async_inflight.get(inflight_key)
+        if task is None:
+            task = asyncio.ensure_future(
+                self._async_fetch(payload, cache_key, search_type, location, cache_tag)
+            )
+            self._async_inflight[inflight_key] = task
+            task.add_done_callback(lambda _: self._async_inflight.pop(inflight_key, None))
+        else:
+            logger.debug(f"Waiting for in-flight search: {cache_key}")
+        return await asyncio.shield(task)
+    
+    async def _async_fetch(self, payload: Dict[str, Any], cache_key: str, search_type: str,
+                           location: Optional[str], cache_tag: Optional[str]) -> Dict[str, Any]:
+        """Request a search from the API without blocking, retrying transient failures."""
+        for attempt in range(MAX_SEARCH_ATTEMPTS):
+            try:
+                return await self._async_post_search(payload, cache_key, search_type, location, cache_tag)
+            except (RateLimitException, httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt == MAX_SEARCH_ATTEMPTS - 1:
+                    raise
+                delay = _retry_delay(attempt)
+                logger.info(f"Retrying search in {delay}s after {type(e).__name__}")
+                await asyncio.sleep(delay)
+    
+    async def _async_post_search(self, payload: Dict[str, Any], cache_key: str, search_type: str,
+                                 location: Optional[str], cache_tag: Optional[str]) -> Dict[str, Any]:
+        """Send one search request to the Serper API without blocking and cache the result."""
+        bucket_key = await asyncio.to_thread(self._reserve_api_call)
+        
+        try:
+            try:
+                start_time = time.time()
+                response = await self._async_client().post(self._search_url, content=orjson.dumps(payload))
+                end_time = time.time()
+                
+            except httpx.TimeoutException:
+                logger.warning("Serper API request timed out")
+                raise
+                
+            except httpx.NetworkError:
+                logger.warning("Connection error when accessing Serper API")
+                raise
+                
+            except httpx.HTTPError as e:
+                logger.error(f"Error in search request: {str(e)}")
+                raise SearchRequestException(f"Search failed: {str(e)}")
             
-        except requests.exceptions.ConnectionError:
-            logger.warning("Connection error when accessing Serper API")
+            result = self._handle_response(response, payload['q'], search_type, location,
+                                           end_time - start_time)
+        except BaseException:
+            await asyncio.to_thread(self._release_api_call, bucket_key)
             raise
-            
-        except Exception as e:
-            logger.error(f"Unexpected error in search: {str(e)}")
-            raise SearchRequestException(f"Search failed: {str(e)}")
+        
+        await asyncio.to_thread(self._save_to_cache, cache_key, result, cache_tag)
+        
+        return result
     
     def search_parallel(self, queries: List[Dict]) -> List[Dict[str, Any]]:
         """
-        Perform multiple search queries in parallel using threading.
+        Perform multiple search queries in parallel.
         
         Args:
             queries: List of query dictionaries, each containing query parameters
                     (query, search_type, location, num_results)
                     
         Returns:
-            List of search result dictionaries
+            List of search result dictionaries, in the order of the queries
         """
-        results = []
-        
-        # Use ThreadPoolExecutor for parallel execution
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            # Submit all search tasks
-            future_to_query = {}
-            for query_params in queries:
-                future = executor.submit(
-                    self.search,
-                    query=query_params.get('query', ''),
-                    search_type=query_params.get('search_type', 'organic'),
-                    location=query_params.get('location'),
-                    num_results=query_params.get('num_results', 5)
-                )
-                future_to_query[future] = query_params
-            
-            # Collect results as they complete
-            for future in concurrent.futures.as_completed(future_to_query):
-                query_params = future_to_query[future]
-                try:
-                    result = future.result()
-                    results.append({
-                        'query': query_params,
-                        'result': result
-                    })
-                except Exception as e:
-                    logger.error(f"Error in parallel search: {str(e)}")
-                    results.append({
-                        'query': query_params,
-                        'error': str(e)
-                    })
-        
-        return results
+        return self._run_coroutine(self.async_search_parallel(queries))
     
-    def search_hotels(self, location: str, check_in: Optional[str] = None, 
-                     check_out: Optional[str] = None, num_people: int = 2) -> Dict[str, Any]:
+    async def async_search_parallel(self, queries: List[Dict]) -> List[Dict[str, Any]]:
         """
-        Search for hotels in a specific location.
+        Async variant of search_parallel().
         
-        Args:
-            location: Location to search for hotels
-            check_in: Check-in date (optional)
-            check_out: Check-out date (optional)
-            num_people: Number of people (adults)
-            
-        Returns:
-            Search results for hotels
+        The searches run concurrently on one event loop over the pooled async
+        client rather than on a thread each.
         """
-        # Map common airport codes to city names for better search results
-        airport_to_city = {
-            "BKK": "Bangkok",
-            "DMM": "Dammam",
-            "JED": "Jeddah",
-            "RUH": "Riyadh",
-            "DXB": "Dubai",
-            "AUH": "Abu Dhabi",
-            "DOH": "Doha",
-            "CAI": "Cairo",
-            "NYC": "New York City",
-            "LAX": "Los Angeles",
-            "LHR": "London",
-            "CDG": "Paris"
-        }
+        outcomes = await asyncio.gather(*(
+            self.async_search(
+                query=query_params.get('query', ''),
+                search_type=query_params.get('search_type', 'organic'),
+                location=query_params.get('location'),
+                num_results=query_params.get('num_results', 5)
+            )
+            for query_params in queries
+        ), return_exceptions=True)
+        
+        results = []
+        for query_params, outcome in zip(queries, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Error in parallel search: {str(outcome)}")
+                results.append({
+                    'query': query_params,
+                    'error': str(outcome)
+                })
+            else:
+                results.append({
+                    'query': query_params,
+                    'result': outcome
+                })
         
-        # Check if the location is an airport code and map to city if needed
-        search_location = location
-        if location.upper() in airport_to_city:
-            search_location = airport_to_city[location.upper()]
+        return results
+    
+    def _hotel_query(self, location: str, check_in: Optional[str],
+                     check_out: Optional[str], num_people: int) -> str:
+        """Build the search query for hotels in a location."""
+        # Map airport codes to city names for better search results
+        search_location = AIRPORT_TO_CITY.get(location.upper(), location)
+        if search_location is not location:
             logger.info(f"Mapped airport code {location} to city {search_location} for hotel search")
         
         # Construct a query string that's likely to return relevant hotel results
@@ -415,35 +1032,40 @@ class SearchToolManager:
         if num_people > 1:
             query_parts.append(f"for {num_people} people")
         
-        query = " ".join(query_parts)
-        
-        # Use organic search for comprehensive results
-        results = self.search(query, search_type='organic')
-        
-        # Process and structure hotel results
-        processed_results = self._process_hotel_results(results, location)
-        
-        return processed_results
+        return " ".join(query_parts)
     
-    def search_flights(self, origin: str, destination: str, 
-                      departure_date: Optional[str] = None, 
-                      return_date: Optional[str] = None,
-                      num_passengers: int = 1,
-                      time_preference: Optional[str] = None) -> Dict[str, Any]:
+    def search_hotels(self, location: str, check_in: Optional[str] = None, 
+                     check_out: Optional[str] = None, num_people: int = 2) -> Dict[str, Any]:
         """
-        Search for flights between locations.
+        Search for hotels in a specific location.
         
         Args:
-            origin: Origin location
-            destination: Destination location
-            departure_date: Departure date (optional)
-            return_date: Return date (optional)
-            time_preference: Time of day preference (e.g., 'morning', 'afternoon', 'evening')
+            location: Location to search for hotels
+            check_in: Check-in date (optional)
+            check_out: Check-out date (optional)
+            num_people: Number of people (adults)
             
         Returns:
-            Search results for flights
+            Search results for hotels
         """
-        # Construct a query string for flights
+        query = self._hotel_query(location, check_in, check_out, num_people)
+        
+        # Use organic search for comprehensive results
+        results = self.search(query, search_type='organic', cache_tag='hotels')
+        
+        # Process and structure hotel results
+        return self._process_hotel_results(results, location)
+    
+    async def async_search_hotels(self, location: str, check_in: Optional[str] = None,
+                                  check_out: Optional[str] = None, num_people: int = 2) -> Dict[str, Any]:
+        """Async variant of search_hotels()."""
+        query = self._hotel_query(location, check_in, check_out, num_people)
+        results = await self.async_search(query, search_type='organic', cache_tag='hotels')
+        return self._process_hotel_results(results, location)
+    
+    def _flight_query(self, origin: str, destination: str, departure_date: Optional[str],
+                      return_date: Optional[str], time_preference: Optional[str]) -> str:
+        """Build the search query for flights between locations."""
         query_parts = [f"flights from {origin} to {destination}"]
         
         if departure_date:
@@ -456,12 +1078,12 @@ class SearchToolManager:
         if time_preference:
             query_parts.append(f"{time_preference} flights")
         
-        query = " ".join(query_parts)
-        
-        # Use organic search for flight results
-        results = self.search(query, search_type='organic', num_results=10)  # Increased to get more options
-        
-        # Process and structure flight results
+        return " ".join(query_parts)
+    
+    def _flight_response(self, results: Dict[str, Any], origin: str, destination: str,
+                         departure_date: Optional[str], return_date: Optional[str],
+                         time_preference: Optional[str]) -> Dict[str, Any]:
+        """Structure flight search results and record the search parameters."""
         processed_results = self._process_flight_results(results, origin, destination)
         
         # Add search parameters to metadata
@@ -475,6 +1097,43 @@ class SearchToolManager:
         
         return processed_results
     
+    def search_flights(self, origin: str, destination: str, 
+                      departure_date: Optional[str] = None, 
+                      return_date: Optional[str] = None,
+                      num_passengers: int = 1,
+                      time_preference: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Search for flights between locations.
+        
+        Args:
+            origin: Origin location
+            destination: Destination location
+            departure_date: Departure date (optional)
+            return_date: Return date (optional)
+            time_preference: Time of day preference (e.g., 'morning', 'afternoon', 'evening')
+            
+        Returns:
+            Search results for flights
+        """
+        query = self._flight_query(origin, destination, departure_date, return_date, time_preference)
+        
+        # Use organic search for flight results, with more results to get more options
+        results = self.search(query, search_type='organic', num_results=10, cache_tag='flights')
+        
+        return self._flight_response(results, origin, destination, departure_date,
+                                     return_date, time_preference)
+    
+    async def async_search_flights(self, origin: str, destination: str,
+                                   departure_date: Optional[str] = None,
+                                   return_date: Optional[str] = None,
+                                   num_passengers: int = 1,
+                                   time_preference: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of search_flights()."""
+        query = self._flight_query(origin, destination, departure_date, return_date, time_preference)
+        results = await self.async_search(query, search_type='organic', num_results=10, cache_tag='flights')
+        return self._flight_response(results, origin, destination, departure_date,
+                                     return_date, time_preference)
+    
     def search_destination_info(self, destination: str) -> Dict[str, Any]:
         """
         Search for general information about a destination.
@@ -485,13 +1144,28 @@ class SearchToolManager:
         Returns:
             Search results for destination information
         """
-        # First query for general information
-        general_query = f"travel guide to {destination} things to do attractions"
-        general_results = self.search(general_query, search_type='organic')
+        return self._run_coroutine(self.async_search_destination_info(destination))
+    
+    async def async_search_destination_info(self, destination: str) -> Dict[str, Any]:
+        """
+        Search for general information about a destination.
+        
+        The general and image searches are independent, so they run concurrently.
         
-        # Second query for images of the destination
+        Args:
+            destination: Destination to get information about
+            
+        Returns:
+            Search results for destination information
+        """
+        # General information and images of the destination
+        general_query = f"travel guide to {destination} things to do attractions"
         images_query = f"{destination} travel destination landmarks"
-        image_results = self.search(images_query, search_type='images')
+        
+        general_results, image_results = await asyncio.gather(
+            self.async_search(general_query, search_type='organic', cache_tag='destination'),
+            self.async_search(images_query, search_type='images', cache_tag='destination')
+        )
         
         # Combine and process results
         combined_results = {
@@ -505,6 +1179,15 @@ class SearchToolManager:
         
         return combined_results
     
+    def _weather_query(self, location: str, date: Optional[str]) -> str:
+        """Build the search query for the weather in a location."""
+        query_parts = [f"weather forecast {location}"]
+        
+        if date:
+            query_parts.append(f"on {date}")
+        
+        return " ".join(query_parts)
+    
     def search_weather(self, location: str, date: Optional[str] = None) -> Dict[str, Any]:
         """
         Search for weather information for a location.
@@ -516,20 +1199,19 @@ class SearchToolManager:
         Returns:
             Search results for weather information
         """
-        query_parts = [f"weather forecast {location}"]
-        
-        if date:
-            query_parts.append(f"on {date}")
-        
-        query = " ".join(query_parts)
+        query = self._weather_query(location, date)
         
         # Use organic search for weather information
-        results = self.search(query, search_type='organic')
+        results = self.search(query, search_type='organic', cache_tag='weather')
         
         # Process and structure weather results
-        processed_results = self._process_weather_results(results, location)
-        
-        return processed_results
+        return self._process_weather_results(results, location)
+    
+    async def async_search_weather(self, location: str, date: Optional[str] = None) -> Dict[str, Any]:
+        """Async variant of search_weather()."""
+        query = self._weather_query(location, date)
+        results = await self.async_search(query, search_type='organic', cache_tag='weather')
+        return self._process_weather_results(results, location)
     
     def search_visa_requirements(self, from_country: str, to_country: str) -> Dict[str, Any]:
         """
@@ -545,12 +1227,71 @@ class SearchToolManager:
         query = f"visa requirements for {from_country} citizens traveling to {to_country}"
         
         # Use organic search for visa information
-        results = self.search(query, search_type='organic')
+        results = self.search(query, search_type='organic', cache_tag='visa')
         
         # Process and structure visa results
-        processed_results = self._process_visa_results(results, from_country, to_country)
+        return self._process_visa_results(results, from_country, to_country)
+    
+    async def async_search_visa_requirements(self, from_country: str, to_country: str) -> Dict[str, Any]:
+        """Async variant of search_visa_requirements()."""
+        query = f"visa requirements for {from_country} citizens traveling to {to_country}"
+        results = await self.async_search(query, search_type='organic', cache_tag='visa')
+        return self._process_visa_results(results, from_country, to_country)
+    
+    async def plan_trip(
+        self,
+        *,
+        origin: str,
+        destination: str,
+        departure_date: Optional[str] = None,
+        return_date: Optional[str] = None,
+        num_people: int = 2,
+        from_country: Optional[str] = None,
+        to_country: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Run every search needed to plan a trip concurrently.
         
-        return processed_results
+        Hotels, flights, destination information, weather and (when from_country
+        is given) visa requirements are searched at the same time over the shared
+        async client, so the total latency is that of the slowest search.
+        
+        Args:
+            origin: Origin location
+            destination: Destination location
+            departure_date: Departure date (optional)
+            return_date: Return date (optional)
+            num_people: Number of travelers
+            from_country: Traveler's country, needed for the visa search (optional)
+            to_country: Destination country for the visa search, defaults to destination
+            
+        Returns:
+            Dictionary of results by search, with {'error': message} for failed searches
+        """
+        searches = {
+            'hotels': self.async_search_hotels(destination, departure_date, return_date, num_people),
+            'flights': self.async_search_flights(origin, destination, departure_date, return_date,
+                                                 num_passengers=num_people),
+            'destination_info': self.async_search_destination_info(destination),
+            'weather': self.async_search_weather(destination, departure_date)
+        }
+        if from_country:
+            searches['visa'] = self.async_search_visa_requirements(from_country, to_country or destination)
+        
+        results = await asyncio.gather(
+            *searches.values(),
+            return_exceptions=True
+        )
+        
+        trip = {}
+        for name, result in zip(searches, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error in {name} search while planning trip: {str(result)}")
+                trip[name] = {'error': str(result)}
+            else:
+                trip[name] = result
+        
+        return trip
     
     def _process_hotel_results(self, results: Dict[str, Any], location: str) -> Dict[str, Any]:
         """Process and structure hotel search results."""
@@ -603,47 +1344,64 @@ class SearchToolManager:
         
         # Extract organic results if available
         if 'organic' in results:
-            # Process flight options
-            for item in results['organic'][:10]:  # Increased limit to get more options
+            providers = set()
+            domains = []
+            
+            # Collect booking providers from every result and flight options
+            # from the top results in a single pass
+            for index, item in enumerate(results['organic']):
+                link = item.get('link', '')
+                domain = self._extract_domain(link)
+                domains.append(domain)
+                if domain and _FLIGHT_PROVIDER_RE.search(domain):
+                    providers.add(domain)
+                
+                if index >= 10:  # Increased limit to get more options
+                    continue
+                
                 # Skip results that don't seem flight-related
                 title = item.get('title', '').lower()
-                snippet = item.get('snippet', '').lower()
                 
-                if not any(kw in title for kw in ['flight', 'air', 'book', 'cheap', 'ticket']):
+                if not _FLIGHT_TITLE_RE.search(title):
                     continue
+                
+                # Lowercased once here; every extractor below expects it
+                snippet = item.get('snippet', '').lower()
+                text = f"{title} {snippet}"
                     
                 flight = {
                     'title': item.get('title', ''),
                     'description': item.get('snippet', ''),
-                    'link': item.get('link', ''),
-                    'source': self._extract_domain(item.get('link', '')),
+                    'link': link,
+                    'source': domain,
                 }
                 
                 # Extract departure times if available
-                times = self._extract_flight_times(title, snippet)
+                times = self._extract_flight_times(text)
                 if times:
                     flight['departure_time'] = times.get('departure')
                     flight['arrival_time'] = times.get('arrival')
                 
                 # Extract airline if available
-                airline = self._extract_airline(title, snippet)
+                airline = self._extract_airline(text)
                 if airline:
                     flight['airline'] = airline
                     if airline not in processed['airlines']:
                         processed['airlines'].append(airline)
                 
-                # Extract flight number if available
-                flight_number = self._extract_flight_number(title, snippet)
+                # Flight numbers, durations and prices all contain digits, so
+                # results without any skip those scans
+                flight_number = duration = price = None
+                if _DIGIT_RE.search(text):
+                    flight_number = self._extract_flight_number(text)
+                    duration = self._extract_duration(text)
+                    price = self._extract_price(text)
+                
+                # Add flight number, duration and price if available
                 if flight_number:
                     flight['flight_number'] = flight_number
-                
-                # Extract duration if available
-                duration = self._extract_duration(title, snippet)
                 if duration:
                     flight['duration'] = duration
-                
-                # Extract price if available
-                price = self._extract_price(title, snippet)
                 if price:
                     flight['price'] = price
                     
@@ -659,18 +1417,10 @@ class SearchToolManager:
                     }
                     processed['flight_times'].append(time_info)
             
-            # Extract flight booking providers
-            providers = set()
-            for item in results['organic']:
-                domain = self._extract_domain(item.get('link', ''))
-                if domain and any(kw in domain for kw in ['expedia', 'kayak', 'booking', 'skyscanner', 
-                                                         'trip', 'flight', 'air', 'airlines']):
-                    providers.add(domain)
-            
             processed['providers'] = list(providers)
             
             # Extract price information from specific sites
-            price_info = self._extract_price_info(results['organic'])
+            price_info = self._extract_price_info(results['organic'], domains)
             if price_info:
                 processed['prices'] = price_info
         
@@ -698,7 +1448,7 @@ class SearchToolManager:
         # Extract organic results that might contain forecast information
         if 'organic' in results:
             for item in results['organic'][:3]:  # Limit to top 3 results
-                if any(kw in item.get('title', '').lower() for kw in ['weather', 'forecast', 'temperature']):
+                if _WEATHER_TITLE_RE.search(item.get('title', '').lower()):
                     forecast_item = {
                         'title': item.get('title', ''),
                         'description': item.get('snippet', ''),
@@ -735,7 +1485,7 @@ class SearchToolManager:
                 source = self._extract_domain(item.get('link', ''))
                 
                 # Categorize the result
-                if any(kw in source for kw in ['gov', 'embassy', 'official', 'ministry']):
+                if _OFFICIAL_SOURCE_RE.search(source):
                     processed['official_sources'].append({
                         'title': item.get('title', ''),
                         'description': item.get('snippet', ''),
@@ -752,48 +1502,16 @@ class SearchToolManager:
         
         return processed
     
-    def _extract_domain(self, url: str) -> str:
-        """Extract domain name from URL."""
-        if not url:
-            return ""
-        
-        try:
-            from urllib.parse import urlparse
-            domain = urlparse(url).netloc
-            # Remove 'www.' if present
-            if domain.startswith('www.'):
-                domain = domain[4:]
-            return domain
-        except:
-            # Fallback to simple splitting if parsing fails
-            try:
-                domain = url.split('//')[1].split('/')[0]
-                if domain.startswith('www.'):
-                    domain = domain[4:]
-                return domain
-            except:
-                return ""
-    
-    def _extract_flight_times(self, title: str, description: str) -> Dict[str, str]:
-        """Extract departure and arrival times from flight information."""
-        import re
+    # The memoized module-level helper, shared by every manager
+    _extract_domain = staticmethod(_extract_domain)
+    
+    def _extract_flight_times(self, text: str) -> Dict[str, str]:
+        """Extract departure and arrival times from lowercased flight title and description text."""
         times = {}
         
-        # Combined text to search through
-        text = f"{title} {description}".lower()
-        
-        # Common time patterns (both 12h and 24h formats)
-        time_patterns = [
-            r'depart\w*\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',  # departs at 10:30am
-            r'departure\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',    # departure at 10:30am
-            r'leaves?\s+(?:at\s+)?(\d{1,2}:\d{2}\s*(?:am|pm)?)',     # leaves at 10:30am
-            r'(\d{1,2}:\d{2}\s*(?:am|pm)?)\s+to\s+(\d{1,2}:\d{2}\s*(?:am|pm)?)',  # 10:30am to 12:45pm
-            r'(\d{1,2}(?::\d{2})?\s*(?:am|pm))\s*[-–—]\s*(\d{1,2}(?::\d{2})?\s*(?:am|pm))'  # 10:30am-12:45pm
-        ]
-        
         # Look for departure time
-        for pattern in time_patterns:
-            matches = re.search(pattern, text, re.IGNORECASE)
+        for pattern in _FLIGHT_TIME_PATTERNS:
+            matches = pattern.search(text)
             if matches:
                 if len(matches.groups()) == 1:
                     times['departure'] = matches.group(1).strip()
@@ -813,48 +1531,18 @@ class SearchToolManager:
         
         return times
     
-    def _extract_airline(self, title: str, description: str) -> Optional[str]:
-        """Extract airline name from flight information."""
-        # Common airlines to look for
-        airlines = [
-            'Emirates', 'Qatar Airways', 'Etihad', 'Saudia', 'Flynas', 'Flyadeal',
-            'Turkish Airlines', 'Pegasus', 'EgyptAir', 'Air Arabia', 'Gulf Air',
-            'Royal Jordanian', 'Middle East Airlines', 'Oman Air', 'Kuwait Airways',
-            'American', 'Delta', 'United', 'Southwest', 'JetBlue', 'British Airways',
-            'Lufthansa', 'Air France', 'KLM', 'Iberia', 'Ryanair', 'easyJet',
-            'Air Canada', 'Singapore Airlines', 'Cathay Pacific', 'ANA', 'JAL'
-        ]
-        
-        # Combined text to search through
-        text = f"{title} {description}"
-        
-        # Check for each airline
-        for airline in airlines:
-            if airline.lower() in text.lower():
-                return airline
-            # Check for abbreviations
-            abbr = ''.join([word[0] for word in airline.split() if word])
-            if len(abbr) > 1 and abbr.upper() in text.upper():
+    def _extract_airline(self, text: str) -> Optional[str]:
+        """Extract airline name from lowercased flight title and description text."""
+        for needle, airline in _AIRLINE_SEARCH:
+            if needle in text:
                 return airline
         
         return None
     
-    def _extract_flight_number(self, title: str, description: str) -> Optional[str]:
-        """Extract flight number from flight information."""
-        import re
-        
-        # Combined text to search through
-        text = f"{title} {description}"
-        
-        # Common flight number patterns
-        patterns = [
-            r'flight\s+(?:number\s+)?([A-Z]{2}\d{1,4})',  # Flight EK123
-            r'([A-Z]{2})\s*(\d{1,4})\s+flight',           # EK 123 flight
-            r'flight\s+(?:number\s+)?(\d{1,4})'           # Flight 123
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text, re.IGNORECASE)
+    def _extract_flight_number(self, text: str) -> Optional[str]:
+        """Extract flight number from lowercased flight title and description text."""
+        for pattern in _FLIGHT_NUMBER_PATTERNS:
+            match = pattern.search(text)
             if match:
                 # Handle different group configurations
                 if len(match.groups()) == 1:
@@ -864,54 +1552,32 @@ class SearchToolManager:
         
         return None
     
-    def _extract_duration(self, title: str, description: str) -> Optional[str]:
-        """Extract flight duration from flight information."""
-        import re
-        
-        # Combined text to search through
-        text = f"{title} {description}".lower()
-        
-        # Duration patterns
-        patterns = [
-            r'(?:flight|duration|time)\s+(?:of\s+)?(\d+\s*h(?:ours?)?(?:\s*and\s*|\s*)?\d*\s*m(?:inutes?)?)',  # flight time of 2h 30m
-            r'(\d+\s*h(?:ours?)?(?:\s*and\s*|\s*)?\d*\s*m(?:inutes?)?)\s+(?:flight|duration|time)',  # 2h 30m flight time
-            r'(\d+\s*hours?(?:\s*and\s*|\s*)?\d*\s*minutes?)',  # 2 hours and 30 minutes
-            r'(?:takes|duration|time)\s+(?:of\s+)?(\d+:\d{2})'  # takes 2:30
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+    def _extract_duration(self, text: str) -> Optional[str]:
+        """Extract flight duration from lowercased flight title and description text."""
+        for pattern in _DURATION_PATTERNS:
+            match = pattern.search(text)
             if match:
                 return match.group(1).strip()
         
         return None
     
-    def _extract_price(self, title: str, description: str) -> Optional[str]:
-        """Extract price information from flight details."""
-        import re
-        
-        # Combined text to search through
-        text = f"{title} {description}".lower()
-        
-        # Price patterns
-        patterns = [
-            r'\$\s*(\d+(?:,\d+)*(?:\.\d+)?)',  # $123 or $1,234.56
-            r'(\d+(?:,\d+)*(?:\.\d+)?)\s*usd',  # 123 USD or 1,234.56 USD
-            r'(?:price|cost|fare)\s*(?:from|:)?\s*\$\s*(\d+(?:,\d+)*(?:\.\d+)?)',  # price from $123
-            r'(?:price|cost|fare)\s*(?:from|:)?\s*(\d+(?:,\d+)*(?:\.\d+)?)\s*usd',  # price from 123 USD
-            r'(?:price|cost|fare)\s*(?:from|:)?\s*(?:USD|\$)?\s*(\d+(?:,\d+)*(?:\.\d+)?)'  # price from 123
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, text)
+    def _extract_price(self, text: str) -> Optional[str]:
+        """Extract price information from lowercased flight title and description text."""
+        for pattern in _PRICE_PATTERNS:
+            match = pattern.search(text)
             if match:
                 price = match.group(1).strip()
                 return f"${price}" if not price.startswith('$') else price
         
         return None
     
-    def _extract_price_info(self, organic_results: List[Dict[str, Any]]) -> Dict[str, Any]:
-        """Extract detailed price information from search results."""
+    def _extract_price_info(self, organic_results: List[Dict[str, Any]],
+                            domains: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Extract detailed price information from search results.
+        
+        domains, if given, holds the already extracted domain of each result.
+        """
         price_info = {
             'lowest_price': None,
             'one_way': None,
@@ -919,26 +1585,27 @@ class SearchToolManager:
             'by_provider': {}
         }
         
-        for item in organic_results:
+        for index, item in enumerate(organic_results):
             title = item.get('title', '').lower()
             snippet = item.get('snippet', '').lower()
             text = f"{title} {snippet}"
             
-            # Skip non-price related entries
-            if not any(term in text for term in ['price', 'cost', '$', 'usd', 'fare']):
+            # Skip non-price related entries; chained `in` tests are each a
+            # single C-level scan, cheaper than any() or a regex alternation
+            if not ('$' in text or 'price' in text or 'fare' in text
+                    or 'cost' in text or 'usd' in text):
                 continue
                 
             # Extract provider
-            provider = self._extract_domain(item.get('link', ''))
+            provider = domains[index] if domains is not None else self._extract_domain(item.get('link', ''))
             
             # Extract price with context
-            import re
-            price_matches = re.findall(r'\$\s*(\d+(?:,\d+)*(?:\.\d+)?)', text)
+            price_matches = _DOLLAR_PRICE_RE.findall(text)
             
             if price_matches:
                 # Convert first found price to float for comparison
                 try:
-                    price_value = float(price_matches[0].replace(',', ''))
+                    price_value = float(price_matches[0].translate(_STRIP_COMMAS))
                     
                     # Update lowest price if this is the first or a lower price
                     if price_info['lowest_price'] is None or price_value < price_info['lowest_price']:
@@ -5,12 +5,11 @@ Provides integrated security features for input validation, rate limiting, and s
 
 import logging
 from typing import Dict, Any
-from flask import Flask
+from flask import Flask, request, jsonify
 from redis import Redis
 
 from travel_agent.security.input_validation import (
-    InputValidator, validate_json_request, 
-    validate_message_request, validate_session_id
+    InputValidator, validate_json_message_request, validate_session_id
 )
 from travel_agent.security.rate_limiter import RateLimiter, rate_limit
 from travel_agent.security.session_security import SessionManager, require_valid_session
@@ -18,6 +17,9 @@ from travel_agent.security.session_security import SessionManager, require_valid
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# First path segments exempt from the global IP rate limit
+_EXEMPT_ROOTS = frozenset({'static', 'health', 'metrics', 'favicon.ico'})
+
 class SecurityManager:
     """Integrated security manager for the travel agent application."""
     
@@ -52,17 +54,15 @@ class SecurityManager:
         """
         # Apply decorators in specific order
         # 1. Rate limiting - first line of defense
-        # 2. JSON validation - basic format check
-        # 3. Message validation - content validation
-        # 4. Session validation - authentication check
+        # 2. JSON and message validation - format and content checks,
+        #    fused so the body is parsed once
+        # 3. Session validation - authentication check
         
         decorated = rate_limit(self.rate_limiter, key_type='endpoint', identifier=lambda: 'api/chat')(
-            validate_json_request(
-                validate_message_request(
-                    validate_session_id(
-                        require_valid_session(self.session_manager)(
-                            endpoint_function
-                        )
+            validate_json_message_request(
+                validate_session_id(
+                    require_valid_session(self.session_manager)(
+                        endpoint_function
                     )
                 )
             )
@@ -72,15 +72,19 @@ class SecurityManager:
     
     def apply_security(self):
         """Apply security features to Flask routes."""
+        # Bound once so the per-request hook skips the attribute lookups
+        check_rate_limit = self.rate_limiter.is_rate_limited
+        
         # Apply rate limiting to all routes
         @self.app.before_request
         def global_rate_limit():
-            # Skip for static files
-            if request.path.startswith('/static'):
+            # Skip for static files and health/metrics probes
+            parts = request.path.split('/', 2)
+            if len(parts) > 1 and parts[1] in _EXEMPT_ROOTS:
                 return None
                 
             # Apply IP-based rate limiting
-            is_limited, _ = self.rate_limiter.is_rate_limited('ip')
+            is_limited, _ = check_rate_limit('ip')
             if is_limited:
                 return jsonify({'error': 'Rate limit exceeded'}), 429
             
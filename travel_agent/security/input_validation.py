@@ -4,30 +4,75 @@ Implements defense-in-depth approach with comprehensive input validation.
 """
 
 import re
+import string
 import logging
 import html
 from typing import Dict, Any, Optional, Union, List, Tuple
 import json
-from functools import wraps
+from functools import wraps, lru_cache
 from flask import request, jsonify, Response
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Characters allowed in session IDs
+_SESSION_ID_CHARS = frozenset(string.ascii_letters + string.digits + '_-')
+
+
+def _needs_html_escape(value: str) -> bool:
+    """Check for any of the characters html.escape() replaces."""
+    # Each `in` is a single C-level scan, far quicker than iterating
+    # the string against a set
+    return '<' in value or '>' in value or '&' in value or '"' in value or "'" in value
+
+
+def _is_session_id(value: str) -> bool:
+    """Check for 1-64 ASCII letters, digits, underscores or hyphens."""
+    return 1 <= len(value) <= 64 and _SESSION_ID_CHARS.issuperset(value)
+
+
+def _is_airport_code(value: str) -> bool:
+    """Check for a three-letter uppercase ASCII code."""
+    return len(value) == 3 and value.isascii() and value.isalpha() and value.isupper()
+
+
+@lru_cache(maxsize=8192)
+def _validate_session_id_cached(session_id: str) -> Tuple[bool, Optional[str]]:
+    """Validate a session ID, memoized since clients resend the same one."""
+    if not session_id:
+        return False, "Session ID is required"
+        
+    if not _is_session_id(session_id):
+        return False, "Invalid session ID format"
+        
+    return True, None
+
+
 class InputValidator:
     """Validates and sanitizes user input to prevent injection attacks."""
     
-    # Regular expressions for validation
+    # Regular expressions for validation, matched with fullmatch()
     PATTERNS = {
-        'session_id': re.compile(r'^[a-zA-Z0-9_-]{1,64}$'),
-        'message': re.compile(r'^[\s\S]{1,2000}$'),  # Allow any characters but limit length
-        'email': re.compile(r'^[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+$'),
-        'alpha': re.compile(r'^[a-zA-Z]+$'),
-        'alphanumeric': re.compile(r'^[a-zA-Z0-9]+$'),
-        'numeric': re.compile(r'^[0-9]+$'),
-        'airport_code': re.compile(r'^[A-Z]{3}$'),
+        'session_id': re.compile(r'[a-zA-Z0-9_-]{1,64}'),
+        'message': re.compile(r'[\s\S]{1,2000}'),  # Allow any characters but limit length
+        'email': re.compile(r'[a-zA-Z0-9_.+-]+@[a-zA-Z0-9-]+\.[a-zA-Z0-9-.]+'),
+        'alpha': re.compile(r'[a-zA-Z]+'),
+        'alphanumeric': re.compile(r'[a-zA-Z0-9]+'),
+        'numeric': re.compile(r'[0-9]+'),
+        'airport_code': re.compile(r'[A-Z]{3}'),
     }
     
+    # Checks on the request hot path done with string methods instead of
+    # the regex engine; they take precedence over PATTERNS
+    CHECKS = {
+        'session_id': _is_session_id,
+        'airport_code': _is_airport_code,
+    }
+    
+    # Bound matcher for the per-request message validator, so it skips the
+    # lookup in validate_pattern
+    _VALIDATE_MESSAGE = PATTERNS['message'].fullmatch
+    
     @classmethod
     def validate_pattern(cls, value: str, pattern_name: str) -> bool:
         """
@@ -40,11 +85,15 @@ class InputValidator:
         Returns:
             bool: True if valid, False otherwise
         """
+        check = cls.CHECKS.get(pattern_name)
+        if check is not None:
+            return check(value)
+        
         if pattern_name not in cls.PATTERNS:
             logger.warning(f"Unknown validation pattern: {pattern_name}")
             return False
             
-        return bool(cls.PATTERNS[pattern_name].match(value))
+        return cls.PATTERNS[pattern_name].fullmatch(value) is not None
     
     @classmethod
     def sanitize_html(cls, value: str) -> str:
@@ -57,6 +106,9 @@ class InputValidator:
         Returns:
             Sanitized string
         """
+        # Most chat messages have nothing to escape, so skip building a copy
+        if not _needs_html_escape(value):
+            return value
         return html.escape(value)
     
     @classmethod
@@ -99,7 +151,7 @@ class InputValidator:
         if not isinstance(message, str):
             return False, "Message must be a string", None
             
-        if not cls.validate_pattern(message, 'message'):
+        if cls._VALIDATE_MESSAGE(message) is None:
             return False, "Message format is invalid or too long", None
         
         # Sanitize inputs
@@ -119,32 +171,49 @@ class InputValidator:
         Returns:
             Tuple of (is_valid, error_message)
         """
-        if not session_id:
-            return False, "Session ID is required"
-            
-        if not cls.validate_pattern(session_id, 'session_id'):
-            return False, "Invalid session ID format"
-            
-        return True, None
+        return _validate_session_id_cached(session_id)
 
 # Flask validation decorators
+def _read_json_body():
+    """
+    Parse and check the JSON body of the current request.
+    
+    Returns:
+        Tuple of (data, error_response), where error_response is None for a valid body
+    """
+    if not request.is_json:
+        logger.warning("Request content type is not application/json")
+        return None, (jsonify({"error": "Content-Type must be application/json"}), 415)
+        
+    try:
+        data = request.get_json()
+    except Exception as e:
+        logger.warning(f"Invalid JSON in request: {str(e)}")
+        return None, (jsonify({"error": "Invalid JSON in request"}), 400)
+        
+    is_valid, _ = InputValidator.validate_json(data)
+    if not is_valid:
+        return None, (jsonify({"error": "Invalid JSON structure"}), 400)
+    
+    return data, None
+
+def _sanitize_message_body(data: Any):
+    """Validate a message body and store it sanitized on the request; return an error response or None."""
+    is_valid, error, sanitized_data = InputValidator.validate_message_request(data)
+    if not is_valid:
+        return jsonify({"error": error}), 400
+        
+    # Replace request.json with sanitized data
+    request.sanitized_data = sanitized_data
+    return None
+
 def validate_json_request(f):
     """Decorator to validate that the request contains valid JSON."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        if not request.is_json:
-            logger.warning("Request content type is not application/json")
-            return jsonify({"error": "Content-Type must be application/json"}), 415
-            
-        try:
-            data = request.get_json()
-        except Exception as e:
-            logger.warning(f"Invalid JSON in request: {str(e)}")
-            return jsonify({"error": "Invalid JSON in request"}), 400
-            
-        is_valid, parsed_data = InputValidator.validate_json(data)
-        if not is_valid:
-            return jsonify({"error": "Invalid JSON structure"}), 400
+        _, error_response = _read_json_body()
+        if error_response is not None:
+            return error_response
             
         return f(*args, **kwargs)
     return decorated_function
@@ -153,14 +222,26 @@ def validate_message_request(f):
     """Decorator to validate message requests."""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        data = request.get_json()
+        error_response = _sanitize_message_body(request.get_json())
+        if error_response is not None:
+            return error_response
         
-        is_valid, error, sanitized_data = InputValidator.validate_message_request(data)
-        if not is_valid:
-            return jsonify({"error": error}), 400
-            
-        # Replace request.json with sanitized data
-        request.sanitized_data = sanitized_data
+        return f(*args, **kwargs)
+    return decorated_function
+
+def validate_json_message_request(f):
+    """
+    Decorator combining validate_json_request and validate_message_request.
+    
+    Parses the body once and runs both checks in a single wrapper.
+    """
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        data, error_response = _read_json_body()
+        if error_response is None:
+            error_response = _sanitize_message_body(data)
+        if error_response is not None:
+            return error_response
         
         return f(*args, **kwargs)
     return decorated_function
@@ -4,6 +4,7 @@ Implements IP-based and token-based rate limiting to prevent abuse.
 """
 
 import time
+import uuid
 import logging
 from typing import Dict, Tuple, Optional, Any, Callable
 import functools
@@ -13,6 +14,31 @@ from redis import Redis
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Sliding-window log check in one atomic step: drops entries older than the
+# window, counts the rest and records the request only if it is allowed.
+# KEYS[1] = key, ARGV = window start, current time, limit, period, member.
+# Returns the number of requests already in the window.
+SLIDING_WINDOW_SCRIPT = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], 0, ARGV[1])
+local count = redis.call('ZCARD', KEYS[1])
+if count < tonumber(ARGV[3]) then
+    redis.call('ZADD', KEYS[1], ARGV[2], ARGV[5])
+    redis.call('EXPIRE', KEYS[1], ARGV[4])
+end
+return count
+"""
+
+# Fixed-window counter: one integer per key and window instead of one
+# sorted set entry per request. KEYS[1] = window key, ARGV[1] = period.
+# Returns the number of requests in the window including this one.
+FIXED_WINDOW_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
 class RateLimiter:
     """
     Rate limiting implementation with Redis backend.
@@ -27,6 +53,8 @@ class RateLimiter:
             redis_client: Redis client for storing rate limit data
         """
         self.redis = redis_client
+        self._sliding_window = redis_client.register_script(SLIDING_WINDOW_SCRIPT)
+        self._fixed_window = redis_client.register_script(FIXED_WINDOW_SCRIPT)
         self.default_limits = {
             'global': {'rate': 300, 'per': 60 * 60},  # 300 requests per hour globally
             'ip': {'rate': 60, 'per': 60},            # 60 requests per minute per IP
@@ -36,6 +64,23 @@ class RateLimiter:
                 'api/search': {'rate': 5, 'per': 60}, # 5 requests per minute for search endpoint
             }
         }
+        # (limit, period) by key type, and by 'endpoint:<name>' for
+        # endpoints, so a request resolves its defaults in one lookup
+        self._resolved_limits = {
+            key_type: (limits['rate'], limits['per'])
+            for key_type, limits in self.default_limits.items()
+            if key_type != 'endpoint'
+        }
+        self._resolved_limits.update(
+            (f"endpoint:{endpoint}", (limits['rate'], limits['per']))
+            for endpoint, limits in self.default_limits['endpoint'].items()
+        )
+        # High-volume limits use cheap fixed windows; the rest keep the
+        # precise sliding window
+        self.default_strategies = {
+            'ip': 'fixed',
+            'endpoint': 'fixed'
+        }
     
     def _get_rate_limit_key(self, key_type: str, identifier: str = None) -> str:
         """
@@ -60,7 +105,8 @@ class RateLimiter:
             return f"ratelimit:{key_type}:{identifier}"
     
     def is_rate_limited(self, key_type: str, identifier: str = None,
-                       limit: int = None, period: int = None) -> Tuple[bool, Dict[str, Any]]:
+                       limit: int = None, period: int = None,
+                       strategy: str = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Check if a request should be rate limited.
         
@@ -69,48 +115,44 @@ class RateLimiter:
             identifier: Specific identifier (IP address, user ID, endpoint name)
             limit: Maximum number of requests allowed
             period: Time period in seconds
+            strategy: 'fixed' for a counter per period-long window or 'sliding'
+                      for a log of request times over the last period. Defaults
+                      to 'fixed' for ip and endpoint limits, 'sliding' otherwise.
             
         Returns:
             Tuple of (is_limited, rate_limit_info)
         """
         # Get default limit if not specified
         if limit is None or period is None:
-            if key_type == 'endpoint' and identifier in self.default_limits['endpoint']:
-                limit = self.default_limits['endpoint'][identifier]['rate']
-                period = self.default_limits['endpoint'][identifier]['per']
-            elif key_type in self.default_limits:
-                limit = self.default_limits[key_type]['rate']
-                period = self.default_limits[key_type]['per']
-            else:
-                # Use global defaults
-                limit = self.default_limits['global']['rate']
-                period = self.default_limits['global']['per']
+            limit, period = self._resolved_limits.get(
+                f"endpoint:{identifier}" if key_type == 'endpoint' else key_type,
+                self._resolved_limits['global']
+            )
+        
+        if strategy is None:
+            strategy = self.default_strategies.get(key_type, 'sliding')
         
         # Generate key
         key = self._get_rate_limit_key(key_type, identifier)
         current_time = int(time.time())
-        window_start = current_time - period
-        
-        # Use pipeline to ensure atomic operations
-        pipe = self.redis.pipeline()
         
-        # Remove old entries outside of the current time window
-        pipe.zremrangebyscore(key, 0, window_start)
-        
-        # Count requests in the current time window
-        pipe.zcard(key)
-        
-        # Add current request timestamp to the sorted set
-        pipe.zadd(key, {str(current_time): current_time})
-        
-        # Set expiry on the key to clean up automatically
-        pipe.expire(key, period)
-        
-        # Execute pipeline
-        results = pipe.execute()
-        
-        # Get count of requests in window
-        request_count = results[1]
+        if strategy == 'fixed':
+            # Count this request in the current window; earlier requests are
+            # the count without it
+            window = current_time // period
+            request_count = self._fixed_window(keys=[f"{key}:{window}"], args=[period]) - 1
+            reset = (window + 1) * period
+        else:
+            window_start = current_time - period
+            
+            # Trim, count and record in one atomic script call, so concurrent
+            # requests cannot both pass on the same count. Members are unique so
+            # requests within the same second are all counted.
+            request_count = self._sliding_window(
+                keys=[key],
+                args=[window_start, current_time, limit, period, f"{current_time}:{uuid.uuid4().hex}"]
+            )
+            reset = window_start + period
         
         # Check if rate limit exceeded
         is_limited = request_count >= limit
@@ -119,8 +161,9 @@ class RateLimiter:
         rate_limit_info = {
             'limit': limit,
             'remaining': max(0, limit - request_count),
-            'reset': window_start + period,
-            'count': request_count
+            'reset': reset,
+            'count': request_count,
+            'now': current_time
         }
         
         if is_limited:
@@ -175,14 +218,15 @@ def rate_limit(limiter: RateLimiter,
             
             # Return 429 Too Many Requests if rate limited
             if is_limited:
+                retry_after = rate_limit_info['reset'] - rate_limit_info['now']
                 response = jsonify({
                     'error': 'Rate limit exceeded',
-                    'retry_after': rate_limit_info['reset'] - int(time.time())
+                    'retry_after': retry_after
                 })
                 response.status_code = 429
                 for key, value in headers.items():
                     response.headers[key] = value
-                response.headers['Retry-After'] = str(rate_limit_info['reset'] - int(time.time()))
+                response.headers['Retry-After'] = str(retry_after)
                 return response
             
             # Process request normally
@@ -7,7 +7,6 @@ import logging
 import secrets
 import time
 from typing import Dict, Any, Optional, Tuple
-import json
 from functools import wraps
 import uuid
 from flask import request, jsonify, g, session, Response
@@ -16,10 +15,75 @@ from redis import Redis
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Session validation in one atomic step: checks the token still points at
+# the session and is one of its current tokens, loads the session, touches
+# last_access and extends every expiry.
+# KEYS[1] = token key, KEYS[2] = session hash, KEYS[3] = session tokens set,
+# ARGV = session ID, access token, token expiry, session expiry, current time.
+# Returns the session hash as a flat field/value list, 0 for an invalid
+# token, 1 for a missing session or 2 for a token not in the session.
+VALIDATE_SESSION_SCRIPT = """
+local session_id = redis.call('GET', KEYS[1])
+if not session_id or session_id ~= ARGV[1] then
+    return 0
+end
+if not redis.call('ZSCORE', KEYS[3], ARGV[2]) then
+    return 2
+end
+local session = redis.call('HGETALL', KEYS[2])
+if #session == 0 then
+    return 1
+end
+redis.call('HSET', KEYS[2], 'last_access', ARGV[5])
+redis.call('EXPIRE', KEYS[1], ARGV[3])
+redis.call('EXPIRE', KEYS[2], ARGV[4])
+redis.call('EXPIRE', KEYS[3], ARGV[4])
+return session
+"""
+
+# Token rotation in one atomic step: checks the old token like validation
+# does, swaps it for the new one, keeps only the newest tokens and records
+# the rotation, so concurrent rotations of one token cannot both succeed.
+# KEYS[1] = old token key, KEYS[2] = new token key, KEYS[3] = session hash,
+# KEYS[4] = session tokens set, ARGV = session ID, old token, new token,
+# issue time, token expiry, session expiry, tokens to keep, current time.
+# Returns 1 if the token was rotated, 0 otherwise.
+ROTATE_TOKEN_SCRIPT = """
+local session_id = redis.call('GET', KEYS[1])
+if not session_id or session_id ~= ARGV[1] then
+    return 0
+end
+if not redis.call('ZSCORE', KEYS[4], ARGV[2]) or redis.call('EXISTS', KEYS[3]) == 0 then
+    return 0
+end
+redis.call('DEL', KEYS[1])
+redis.call('SET', KEYS[2], ARGV[1], 'EX', ARGV[5])
+redis.call('ZREM', KEYS[4], ARGV[2])
+redis.call('ZADD', KEYS[4], ARGV[4], ARGV[3])
+redis.call('ZREMRANGEBYRANK', KEYS[4], 0, -tonumber(ARGV[7]) - 1)
+redis.call('HSET', KEYS[3], 'last_access', ARGV[8], 'last_rotation', ARGV[8])
+redis.call('EXPIRE', KEYS[3], ARGV[6])
+redis.call('EXPIRE', KEYS[4], ARGV[6])
+return 1
+"""
+
+# Session hash fields stored as integers
+_INT_FIELDS = frozenset({"created_at", "last_access", "last_rotation"})
+
+
+def _text(value) -> str:
+    """Decode a Redis reply value, which is bytes unless decode_responses is set."""
+    return value.decode() if isinstance(value, bytes) else value
+
+
 class SessionManager:
     """
     Secure session management with Redis backend and token rotation.
     Implements defense-in-depth approach to protect session data.
+    
+    Each session is a hash of its fields plus a sorted set of its current
+    tokens scored by issue time, so requests touch single fields instead
+    of rewriting a serialized blob.
     """
     
     def __init__(self, redis_client: Redis):
@@ -27,13 +91,35 @@ class SessionManager:
         Initialize session manager with Redis client.
         
         Args:
-            redis_client: Redis client for storing session data
+            redis_client: Redis client for storing session data; pass the
+                application's shared pooled client so requests reuse its
+                connections
         """
         self.redis = redis_client
         self.session_prefix = "travel_agent:session:"
         self.token_prefix = "travel_agent:token:"
         self.session_expiry = 60 * 60 * 24  # 24 hours
         self.token_expiry = 60 * 60 * 2     # 2 hours
+        self.max_tokens = 3                 # Tokens kept per session after rotation
+        self.rotation_interval = 60 * 5     # Rotate tokens at most every 5 minutes
+        self._validate_session = redis_client.register_script(VALIDATE_SESSION_SCRIPT)
+        self._rotate_token = redis_client.register_script(ROTATE_TOKEN_SCRIPT)
+        
+        # Keys are built as bytes, which redis-py sends without encoding again
+        self._session_prefix_b = self.session_prefix.encode()
+        self._token_prefix_b = self.token_prefix.encode()
+    
+    def _token_key(self, token: str) -> bytes:
+        """Key mapping an access token to its session."""
+        return self._token_prefix_b + token.encode()
+    
+    def _session_key(self, session_id: str) -> bytes:
+        """Key of the hash holding a session's fields."""
+        return self._session_prefix_b + session_id.encode()
+    
+    def _tokens_key(self, session_id: str) -> bytes:
+        """Key of the sorted set holding a session's current tokens."""
+        return self._session_prefix_b + session_id.encode() + b":tokens"
     
     def create_session(self) -> Tuple[str, str]:
         """
@@ -46,24 +132,28 @@ class SessionManager:
         session_id = str(uuid.uuid4())
         access_token = secrets.token_urlsafe(32)
         
-        # Store token with session reference
-        token_key = f"{self.token_prefix}{access_token}"
-        self.redis.set(token_key, session_id)
-        self.redis.expire(token_key, self.token_expiry)
+        token_key = self._token_key(access_token)
+        session_key = self._session_key(session_id)
+        tokens_key = self._tokens_key(session_id)
         
         # Create empty session
-        session_key = f"{self.session_prefix}{session_id}"
+        now = int(time.time())
         session_data = {
-            "created_at": int(time.time()),
-            "last_access": int(time.time()),
-            "ip_address": request.remote_addr,
-            "user_agent": request.headers.get("User-Agent", ""),
-            "tokens": [access_token]
+            "created_at": now,
+            "last_access": now,
+            "last_rotation": now,
+            "ip_address": request.remote_addr or "",
+            "user_agent": request.headers.get("User-Agent", "")
         }
         
-        # Store session data
-        self.redis.set(session_key, json.dumps(session_data))
-        self.redis.expire(session_key, self.session_expiry)
+        # Store token with session reference and session data in one round trip
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.set(token_key, session_id, ex=self.token_expiry)
+        pipe.hset(session_key, mapping=session_data)
+        pipe.expire(session_key, self.session_expiry)
+        pipe.zadd(tokens_key, {access_token: time.time()})
+        pipe.expire(tokens_key, self.session_expiry)
+        pipe.execute()
         
         logger.info(f"Created new session: {session_id}")
         return session_id, access_token
@@ -79,40 +169,35 @@ class SessionManager:
         Returns:
             Tuple of (is_valid, session_data)
         """
-        # Check token validity
-        token_key = f"{self.token_prefix}{access_token}"
-        stored_session_id = self.redis.get(token_key)
+        now = int(time.time())
         
-        if not stored_session_id or stored_session_id.decode() != session_id:
+        # Check the token, load and touch the session and extend expiries
+        result = self._validate_session(
+            keys=[
+                self._token_key(access_token),
+                self._session_key(session_id),
+                self._tokens_key(session_id)
+            ],
+            args=[session_id, access_token, self.token_expiry, self.session_expiry, now]
+        )
+        
+        if result == 0:
             logger.warning(f"Invalid token for session: {session_id}")
             return False, None
         
-        # Get session data
-        session_key = f"{self.session_prefix}{session_id}"
-        session_json = self.redis.get(session_key)
-        
-        if not session_json:
+        if result == 1:
             logger.warning(f"Session not found: {session_id}")
             return False, None
         
-        try:
-            session_data = json.loads(session_json)
-        except json.JSONDecodeError:
-            logger.error(f"Corrupted session data for: {session_id}")
-            return False, None
-        
-        # Verify token is in session tokens list
-        if access_token not in session_data.get("tokens", []):
+        if result == 2:
             logger.warning(f"Token not associated with session: {session_id}")
             return False, None
         
-        # Update last access time
-        session_data["last_access"] = int(time.time())
-        self.redis.set(session_key, json.dumps(session_data))
-        self.redis.expire(session_key, self.session_expiry)
-        
-        # Extend token expiry
-        self.redis.expire(token_key, self.token_expiry)
+        session_data = {}
+        for field, value in zip(result[::2], result[1::2]):
+            field, value = _text(field), _text(value)
+            session_data[field] = int(value) if field in _INT_FIELDS else value
+        session_data["last_access"] = now
         
         return True, session_data
     
@@ -127,43 +212,42 @@ class SessionManager:
         Returns:
             New access token or None if session invalid
         """
-        # Validate current session
-        is_valid, session_data = self.validate_session(session_id, old_token)
-        if not is_valid or not session_data:
-            return None
-        
         # Generate new token
         new_token = secrets.token_urlsafe(32)
         
-        # Remove old token
-        old_token_key = f"{self.token_prefix}{old_token}"
-        self.redis.delete(old_token_key)
-        
-        # Store new token
-        new_token_key = f"{self.token_prefix}{new_token}"
-        self.redis.set(new_token_key, session_id)
-        self.redis.expire(new_token_key, self.token_expiry)
-        
-        # Update session tokens list
-        tokens = session_data.get("tokens", [])
-        if old_token in tokens:
-            tokens.remove(old_token)
-        tokens.append(new_token)
-        
-        # Keep only the last 3 tokens
-        if len(tokens) > 3:
-            tokens = tokens[-3:]
-        
-        session_data["tokens"] = tokens
-        
-        # Update session
-        session_key = f"{self.session_prefix}{session_id}"
-        self.redis.set(session_key, json.dumps(session_data))
-        self.redis.expire(session_key, self.session_expiry)
+        # Check the current token and swap it in one atomic script call
+        now = time.time()
+        rotated = self._rotate_token(
+            keys=[
+                self._token_key(old_token),
+                self._token_key(new_token),
+                self._session_key(session_id),
+                self._tokens_key(session_id)
+            ],
+            args=[
+                session_id, old_token, new_token, now,
+                self.token_expiry, self.session_expiry, self.max_tokens, int(now)
+            ]
+        )
+        if not rotated:
+            logger.warning(f"Cannot rotate token for invalid session: {session_id}")
+            return None
         
         logger.info(f"Rotated token for session: {session_id}")
         return new_token
     
+    def rotation_due(self, session_data: Dict[str, Any]) -> bool:
+        """
+        Check whether a session's token is old enough to rotate.
+        
+        Args:
+            session_data: Session data returned by validate_session
+            
+        Returns:
+            True if the last rotation is at least rotation_interval ago
+        """
+        return int(time.time()) - session_data.get("last_rotation", 0) >= self.rotation_interval
+    
     def invalidate_session(self, session_id: str) -> bool:
         """
         Invalidate a session and all its tokens.
@@ -174,22 +258,23 @@ class SessionManager:
         Returns:
             True if session was invalidated
         """
-        # Get session data
-        session_key = f"{self.session_prefix}{session_id}"
-        session_json = self.redis.get(session_key)
-        
-        if not session_json:
-            return False
+        session_key = self._session_key(session_id)
+        tokens_key = self._tokens_key(session_id)
         
         try:
-            session_data = json.loads(session_json)
-            # Delete all tokens
-            for token in session_data.get("tokens", []):
-                token_key = f"{self.token_prefix}{token}"
-                self.redis.delete(token_key)
+            # Check the session and get its tokens in one round trip
+            pipe = self.redis.pipeline(transaction=False)
+            pipe.exists(session_key)
+            pipe.zrange(tokens_key, 0, -1)
+            exists, tokens = pipe.execute()
+            
+            if not exists:
+                return False
             
-            # Delete session
-            self.redis.delete(session_key)
+            # Delete all tokens and the session with one command; UNLINK frees
+            # the memory in the background instead of on the reply path
+            token_keys = [self._token_key(_text(token)) for token in tokens]
+            self.redis.unlink(*token_keys, session_key, tokens_key)
             logger.info(f"Invalidated session: {session_id}")
             return True
         except Exception as e:
@@ -229,8 +314,10 @@ def require_valid_session(session_manager: SessionManager):
             # Call route handler
             response = f(*args, **kwargs)
             
-            # Add new token to response headers for token rotation
-            if isinstance(response, Response) and request.method != "GET":
+            # Add new token to response headers for token rotation, at most
+            # once per rotation interval so most writes skip the extra round trips
+            if (isinstance(response, Response) and request.method != "GET"
+                    and session_manager.rotation_due(session_data)):
                 new_token = session_manager.rotate_token(session_id, access_token)
                 if new_token:
                     response.headers["X-New-Access-Token"] = new_token
@@ -3,6 +3,10 @@ from typing import Dict, List, Optional, Any, Set
 from pydantic import BaseModel, Field
 from datetime import datetime, date
 
+# Messages and user queries kept per conversation; older ones are dropped so
+# the state saved on every turn stays bounded
+MAX_CONVERSATION_HISTORY = 200
+
 
 class ConversationStage(str, Enum):
     """Defines the current stage of the conversation with the user."""
@@ -118,8 +122,12 @@ class TravelState(BaseModel):
     def add_message(self, role: str, content: str):
         """Add a message to the conversation history."""
         self.conversation_history.append({"role": role, "content": content})
+        if len(self.conversation_history) > MAX_CONVERSATION_HISTORY:
+            del self.conversation_history[:-MAX_CONVERSATION_HISTORY]
         if role == "user":
             self.user_queries.append(content)
+            if len(self.user_queries) > MAX_CONVERSATION_HISTORY:
+                del self.user_queries[:-MAX_CONVERSATION_HISTORY]
     
     def add_search_result(self, result: SearchResult):
         """Add a search result to the appropriate category."""
@@ -181,13 +189,13 @@ class TravelState(BaseModel):
         """Get the primary destination (highest confidence)."""
         if not self.destinations:
             return None
-        return sorted(self.destinations, key=lambda x: x.confidence, reverse=True)[0]
+        return max(self.destinations, key=lambda x: x.confidence)
     
     def get_primary_date_range(self) -> Optional[DateParameter]:
         """Get the primary date range (highest confidence)."""
         if not self.dates:
             return None
-        return sorted(self.dates, key=lambda x: x.confidence, reverse=True)[0]
+        return max(self.dates, key=lambda x: x.confidence)
     
     def has_minimum_parameters(self) -> bool:
         """Check if minimum required parameters are available for search."""